@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Vector index benchmarks.
+
+Measures how long it takes to get a ready retriever from an empty index (cold
+start, every entry embedded), from an up-to-date index (warm start, nothing
+embedded) and after a single entry of the JSON files changed, how many of
+the retrieved candidates are in the requested governorate with and without
+metadata pre-filtering, the cost of turning retrieved documents into the
+planning agent's input, and hybrid retrieval latency for queries that name a
+site versus descriptive ones.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumps, loads
+
+from lexical_index import HybridRetriever
+from vector_index import (DATA_DIR, EMBEDDING_MODEL, INDEX_DIR, SOURCE_FILES, LazyEmbeddings, filter_with_threshold_limit,
+                          governorate, load_catalog, load_documents, open_index, records_from_documents)
+
+QUERY = "Luxor things to do based on preferences: ancient temples and artifacts"
+LOCATION_QUERIES = {
+    "Luxor": "Luxor things to do based on preferences: ancient temples and artifacts",
+    "Cairo": "Cairo things to do based on preferences: Islamic architecture and old mosques",
+    "Aswan": "Aswan things to do based on preferences: Nubian history and temples on the Nile",
+    "Alexandria": "Alexandria things to do based on preferences: Greco-Roman history and the sea",
+}
+NAME_QUERIES = ["Karnak", "karnac", "Valley of the Kings", "philea", "Joseph's Well", "karnak and abu simbel"]
+
+
+def time_start(data_dir: str, index_dir: str, make_embedding: Callable[[], Embeddings]) -> Dict[str, Any]:
+    """Open the index and run one query, timing each step separately."""
+    start = time.perf_counter()
+    index = open_index(data_dir, index_dir, make_embedding(), verbose=False)
+    opened = time.perf_counter()
+    index.as_retriever(search_kwargs={"k": 50}).invoke(QUERY)
+    queried = time.perf_counter()
+    return {"open": opened - start, "first_query": queried - opened, "total": queried - start}
+
+
+def touch_one_entry(data_dir: str) -> None:
+    """Edit the description of one entry, as a re-scrape of a changed page would."""
+    path = os.path.join(data_dir, next(iter(SOURCE_FILES.values())))
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data[0]["description"] = data[0].get("description", "") + " (updated)"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def benchmark_startup(make_embedding: Callable[[], Embeddings]) -> Dict[str, Dict[str, Any]]:
+    """Compare cold, warm and one-entry-changed starts on a copy of json_files/."""
+    work_dir = tempfile.mkdtemp(prefix="rag_benchmark_")
+    data_dir = os.path.join(work_dir, "json_files")
+    index_dir = os.path.join(work_dir, "vector_index")
+    os.makedirs(data_dir)
+    for file_name in SOURCE_FILES.values():
+        shutil.copy(os.path.join(DATA_DIR, file_name), data_dir)
+
+    results = {
+        "cold": time_start(data_dir, index_dir, make_embedding),
+        "warm": time_start(data_dir, index_dir, make_embedding),
+    }
+    touch_one_entry(data_dir)
+    results["one changed"] = time_start(data_dir, index_dir, make_embedding)
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def benchmark_filtering(index, k: int = 50) -> Dict[str, Dict[str, Any]]:
+    """Compare plain top-k similarity with governorate pre-filtering for each location query."""
+    index.retrieve(QUERY, k=1)  # load the embedding model outside the timings
+    results = {}
+    for location, query in LOCATION_QUERIES.items():
+        start = time.perf_counter()
+        plain = index.retrieve(query, k=k)
+        plain_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        filtered = index.retrieve(query, location=location, k=k)
+        filtered_seconds = time.perf_counter() - start
+        results[location] = {
+            "plain": (len(plain), sum(governorate(a.location) == location for a in plain), plain_seconds),
+            "filtered": (len(filtered), sum(governorate(a.location) == location for a in filtered),
+                         filtered_seconds),
+        }
+    return results
+
+
+def legacy_documents() -> List[Document]:
+    """Documents in the previous format: ``str(entry)`` of each raw JSON entry."""
+    docs = []
+    for attraction_type, file_name in SOURCE_FILES.items():
+        with open(os.path.join(DATA_DIR, file_name), "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                entry.update({"type": attraction_type})
+                docs.append(Document(page_content=str(entry)))
+    return docs
+
+
+def legacy_post_retrieval(retrieved_docs: List[Document]) -> List[Dict[str, Any]]:
+    """The previous notebook pipeline: serialize to dedupe, quote-replace and re-parse, then filter."""
+    # get_unique_union was given a flat list, so it iterated each Document's (field, value) pairs
+    flattened_docs = [dumps(doc) for sublist in retrieved_docs for doc in sublist]
+    unique_docs = [loads(doc) for doc in set(flattened_docs)]
+
+    parsed = []
+    for doc in unique_docs:
+        try:
+            content = doc[1]
+            if isinstance(content, dict):
+                parsed.append(content)
+            elif isinstance(content, str):
+                try:
+                    parsed.append(json.loads(content.replace("'", '"')))
+                except json.JSONDecodeError:
+                    continue
+        except (IndexError, TypeError):
+            continue
+
+    below = [item for item in parsed if isinstance(item.get("reviews"), (int, float)) and item["reviews"] < 2000]
+    above = [item for item in parsed if isinstance(item.get("reviews"), (int, float)) and item["reviews"] >= 2000]
+    under = below[:3]
+    return under + above[:8 - len(under)]
+
+
+def benchmark_post_retrieval(k: int = 50, rounds: int = 200) -> Dict[str, Dict[str, Any]]:
+    """Time the stage between retrieval and the planning agent on ``k`` hits, old pipeline vs records."""
+    catalog = load_catalog()
+    legacy_hits = legacy_documents()[:k]
+    hits = load_documents(catalog)[:k]
+
+    results = {}
+    for name, run, docs in (("legacy", legacy_post_retrieval, legacy_hits),
+                            ("records", lambda d: filter_with_threshold_limit(records_from_documents(catalog, d),
+                                                                             2000, 8, 3), hits)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            selected = run(docs)
+        seconds = (time.perf_counter() - start) / rounds
+        results[name] = {"seconds": seconds, "selected": len(selected)}
+
+    parsed = 0
+    for doc in legacy_hits:
+        try:
+            json.loads(doc.page_content.replace("'", '"'))
+            parsed += 1
+        except json.JSONDecodeError:
+            pass
+    results["legacy"]["parsed"] = parsed
+    results["records"]["parsed"] = len(records_from_documents(catalog, hits))
+    return results
+
+
+def benchmark_hybrid(retriever: HybridRetriever, rounds: int = 20) -> Dict[str, Dict[str, Any]]:
+    """Mean latency of exact-name and descriptive queries, and whether name queries loaded the model."""
+    results = {}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in NAME_QUERIES:
+            retriever.retrieve(query)
+    results["exact name"] = {
+        "seconds": (time.perf_counter() - start) / (rounds * len(NAME_QUERIES)),
+        "model_loaded": getattr(retriever.index.embedding, "loaded", True),
+    }
+
+    start = time.perf_counter()
+    retriever.retrieve(QUERY)
+    results["first descriptive"] = {"seconds": time.perf_counter() - start,
+                                    "model_loaded": getattr(retriever.index.embedding, "loaded", True)}
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for location, query in LOCATION_QUERIES.items():
+            retriever.retrieve(query, location=location)
+    results["descriptive"] = {"seconds": (time.perf_counter() - start) / (rounds * len(LOCATION_QUERIES)),
+                              "model_loaded": True}
+    return results
+
+
+def run_startup(args) -> None:
+    results = benchmark_startup(lambda: LazyEmbeddings(args.model))
+
+    print(f"\nVector index startup with {args.model}:")
+    print("=" * 60)
+    for name, result in results.items():
+        print(f"  {name:<12} open {result['open']:7.2f}s  first query {result['first_query']:7.2f}s  "
+              f"total {result['total']:7.2f}s")
+    print(f"  Warm start speedup: {results['cold']['total'] / results['warm']['total']:.1f}x")
+
+
+def run_filtering(args) -> None:
+    index = open_index(persist_directory=args.index, embedding=LazyEmbeddings(args.model))
+    results = benchmark_filtering(index, args.k)
+
+    print(f"\nCandidates in the requested governorate (k={args.k}):")
+    print("=" * 60)
+    for location, result in results.items():
+        for mode, (hits, relevant, seconds) in result.items():
+            print(f"  {location:<12} {mode:<9} {relevant:3d}/{hits:<3d} relevant  {seconds * 1000:7.1f} ms")
+
+
+def run_post_retrieval(args) -> None:
+    results = benchmark_post_retrieval(args.k, args.rounds)
+
+    print(f"\nPost-retrieval stage on {args.k} hits:")
+    print("=" * 60)
+    for name, result in results.items():
+        print(f"  {name:<8} {result['seconds'] * 1000:8.3f} ms  {result['parsed']:3d}/{args.k} hits usable  "
+              f"{result['selected']} selected")
+    print(f"  Speedup: {results['legacy']['seconds'] / results['records']['seconds']:.0f}x")
+
+
+def run_hybrid(args) -> None:
+    index = open_index(persist_directory=args.index, embedding=LazyEmbeddings(args.model))
+    results = benchmark_hybrid(HybridRetriever(index), args.rounds)
+
+    print("\nHybrid retrieval latency:")
+    print("=" * 60)
+    for name, result in results.items():
+        print(f"  {name:<18} {result['seconds'] * 1000:9.2f} ms  "
+              f"embedding model loaded: {'yes' if result['model_loaded'] else 'no'}")
+
+
+def main():
+    """Main entry point with argument parsing."""
+    parser = argparse.ArgumentParser(description="Benchmarks for the persistent RAG vector index")
+    parser.add_argument("--model", default=EMBEDDING_MODEL, help="HuggingFace embedding model to benchmark")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup = subparsers.add_parser("startup", help="Compare cold, warm and one-entry-changed starts")
+    startup.set_defaults(func=run_startup)
+
+    filtering = subparsers.add_parser("filtering", help="Compare plain and governorate-filtered retrieval")
+    filtering.add_argument("--index", default=INDEX_DIR, help="Index directory (default: the notebook's index)")
+    filtering.add_argument("--k", type=int, default=50, help="Number of candidates to retrieve")
+    filtering.set_defaults(func=run_filtering)
+
+    post_retrieval = subparsers.add_parser("post-retrieval", help="Compare the old parsing pipeline with records")
+    post_retrieval.add_argument("--k", type=int, default=50, help="Number of retrieved hits")
+    post_retrieval.add_argument("--rounds", type=int, default=200, help="Repetitions to average over")
+    post_retrieval.set_defaults(func=run_post_retrieval)
+
+    hybrid = subparsers.add_parser("hybrid", help="Latency of exact-name vs descriptive hybrid queries")
+    hybrid.add_argument("--index", default=INDEX_DIR, help="Index directory (default: the notebook's index)")
+    hybrid.add_argument("--rounds", type=int, default=20, help="Repetitions to average over")
+    hybrid.set_defaults(func=run_hybrid)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
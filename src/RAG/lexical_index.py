@@ -0,0 +1,212 @@
+"""
+In-process lexical index and hybrid retrieval for the RAG notebook.
+
+Builds a BM25 index over the scraped ``name``, ``location`` and ``description``
+fields plus a trigram index of attraction names, both in memory from the
+catalog. Queries that just name one or more sites ("Karnak", "valley of the
+kings", "philea") are answered from these indexes alone, without loading the
+embedding model. Other queries fuse the BM25, name and vector rankings with
+reciprocal rank fusion.
+"""
+
+import difflib
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from vector_index import SOURCE_FILES, Attraction, AttractionCatalog, PersistentVectorIndex, governorate
+
+# Field weights of the BM25 document: a name hit counts three times a description hit
+FIELD_WEIGHTS = {"name": 3, "location": 2, "description": 1}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant; 60 is the usual choice
+RRF_K = 60
+
+FUZZY_CUTOFF = 0.8
+NAME_MATCH_THRESHOLD = 0.8
+
+STOPWORDS = {
+    "a", "about", "all", "am", "an", "and", "any", "are", "at", "based", "be", "by", "can", "do", "for", "from",
+    "go", "i", "in", "is", "it", "like", "me", "my", "of", "on", "or", "preferences", "see", "should", "show",
+    "some", "the", "there", "things", "to", "visit", "want", "what", "where", "which", "with", "would", "you",
+}
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with accents and punctuation removed."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN.findall(text)
+
+
+def trigrams(tokens: Iterable[str]) -> Set[str]:
+    """Character trigrams of each token padded with spaces, so word boundaries count."""
+    grams = set()
+    for token in tokens:
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class LexicalIndex:
+    """BM25 over name, location and description, with fuzzy term and name matching."""
+
+    def __init__(self, catalog: AttractionCatalog):
+        self.catalog = catalog
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self._lengths: List[float] = []
+        self._name_grams: List[Set[str]] = []
+        self._name_tokens: List[Set[str]] = []
+        self._gram_postings: Dict[str, List[int]] = defaultdict(list)
+
+        for i in range(len(catalog)):
+            attraction = catalog[i]
+            tf: Counter = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(getattr(attraction, field)):
+                    tf[token] += weight
+            for token, count in tf.items():
+                self._postings[token].append((i, count))
+            self._lengths.append(sum(tf.values()))
+
+            name_tokens = [t for t in tokenize(attraction.name) if t not in STOPWORDS]
+            grams = trigrams(name_tokens)
+            self._name_grams.append(grams)
+            self._name_tokens.append(set(name_tokens))
+            for gram in grams:
+                self._gram_postings[gram].append(i)
+
+        self._name_vocab_set = set().union(*self._name_tokens) if self._name_tokens else set()
+        self._name_vocab = sorted(self._name_vocab_set)
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        self._idf = {
+            token: math.log(1 + (len(catalog) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+        # Trigram index of the vocabulary, used to find candidates for misspelled terms
+        self._vocab_grams: Dict[str, List[str]] = defaultdict(list)
+        for token in self._postings:
+            for gram in trigrams([token]):
+                self._vocab_grams[gram].append(token)
+        self._governorate_tokens = {t for loc in catalog.location_names() for t in tokenize(governorate(loc))}
+
+    def expand(self, term: str) -> List[Tuple[str, float]]:
+        """The term itself if indexed, else vocabulary terms it is a likely misspelling of."""
+        if term in self._postings:
+            return [(term, 1.0)]
+        if len(term) < 4:
+            return []
+        candidates = Counter(t for gram in trigrams([term]) for t in self._vocab_grams.get(gram, ()))
+        matches = []
+        for candidate, _ in candidates.most_common(20):
+            ratio = difflib.SequenceMatcher(None, term, candidate).ratio()
+            if ratio >= FUZZY_CUTOFF:
+                matches.append((candidate, ratio))
+        return matches
+
+    def search(self, query: str, k: int = 50, allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """Top ``k`` ``(id, bm25 score)`` pairs, restricted to ``allowed`` ids if given."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)) - STOPWORDS:
+            for token, weight in self.expand(term):
+                idf = self._idf[token] * weight
+                for i, tf in self._postings[token]:
+                    if allowed is not None and i not in allowed:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[i] / self._avg_length)
+                    scores[i] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def correct(self, tokens: List[str]) -> List[str]:
+        """``tokens`` plus the closest name word for each one that is not a name word itself."""
+        corrected = list(tokens)
+        for token in tokens:
+            if len(token) >= 4 and token not in STOPWORDS and token not in self._name_vocab_set:
+                corrected.extend(difflib.get_close_matches(token, self._name_vocab, n=1, cutoff=FUZZY_CUTOFF))
+        return corrected
+
+    def match_names(self, query: str, threshold: float = NAME_MATCH_THRESHOLD) -> List[Tuple[int, float]]:
+        """Attractions whose name appears in the query, allowing small misspellings.
+
+        The score is the share of the name's trigrams found in the query, so a
+        name mentioned anywhere in a longer query still scores 1.0.
+        """
+        query_grams = trigrams(self.correct(tokenize(query)))
+        shared = Counter(i for gram in query_grams for i in self._gram_postings.get(gram, ()))
+        matches = []
+        for i, count in shared.items():
+            score = count / len(self._name_grams[i])
+            if score >= threshold:
+                matches.append((i, score))
+        return sorted(matches, key=lambda item: (-item[1], item[0]))
+
+    def exact_name_matches(self, query: str) -> List[Attraction]:
+        """Records named by a query that consists only of attraction names, else ``[]``.
+
+        Every content word of the query must be (a close spelling of) a word of a
+        matched name, and a bare governorate such as "Aswan" is not treated as a name.
+        """
+        terms = [t for t in tokenize(query) if t not in STOPWORDS]
+        if not terms or all(t in self._governorate_tokens for t in terms):
+            return []
+        matches = self.match_names(query)
+        if not matches:
+            return []
+
+        name_tokens = set().union(*(self._name_tokens[i] for i, _ in matches))
+        for term in terms:
+            if term not in name_tokens and not difflib.get_close_matches(term, name_tokens, n=1,
+                                                                         cutoff=FUZZY_CUTOFF):
+                return []
+        return [self.catalog[i] for i, _ in matches]
+
+
+class HybridRetriever:
+    """Fuses lexical and vector retrieval; exact-name queries never touch the embedding model."""
+
+    def __init__(self, index: PersistentVectorIndex, lexical: Optional[LexicalIndex] = None):
+        self.index = index
+        self.catalog = index.catalog
+        self.lexical = lexical or LexicalIndex(index.catalog)
+
+    def allowed_ids(self, location: Optional[str] = None, types: Optional[List[str]] = None,
+                    outdoor: Optional[bool] = None) -> Optional[Set[int]]:
+        """Ids passing the same filters as the vector search, or ``None`` for no restriction."""
+        resolved = self.index.resolve_governorate(location)
+        types = [t for t in types or [] if t in SOURCE_FILES]
+        if resolved is None and not types and outdoor is None:
+            return None
+        # The catalog indexes every governorate/type/outdoor combination, so this costs O(result)
+        allowed = set()
+        for attraction_type in types or [None]:
+            allowed.update(self.catalog.ids(resolved, attraction_type, outdoor))
+        return allowed or None
+
+    def retrieve(self, query: str, location: Optional[str] = None, types: Optional[List[str]] = None,
+                 outdoor: Optional[bool] = None, k: int = 50) -> List[Attraction]:
+        """Records for ``query``, ranked by reciprocal rank fusion of BM25, name and vector hits.
+
+        Sites named explicitly are returned as they are, ignoring the filters.
+        """
+        named = self.lexical.exact_name_matches(query)
+        if named:
+            return named[:k]
+
+        allowed = self.allowed_ids(location, types, outdoor)
+        rankings = [
+            [i for i, _ in self.lexical.search(query, k, allowed)],
+            [i for i, _ in self.lexical.match_names(query) if allowed is None or i in allowed],
+            [a.id for a in self.index.retrieve(query, location, types, outdoor, k)],
+        ]
+
+        fused: Dict[int, float] = defaultdict(float)
+        for ranking in rankings:
+            for rank, i in enumerate(ranking):
+                fused[i] += 1.0 / (RRF_K + rank + 1)
+        ranked = sorted(fused, key=lambda i: (-fused[i], i))[:k]
+        return [self.catalog[i] for i in ranked]
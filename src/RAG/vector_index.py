@@ -0,0 +1,284 @@
+"""
+Persistent vector index for the RAG retriever.
+
+Keeps the Chroma collection built from the four scraped JSON files on disk and
+keys every embedding by a content hash of its document. Opening the index only
+embeds documents that were added or changed since the last run and deletes the
+ones that disappeared, instead of re-embedding the whole catalog on every start.
+
+Every document carries its governorate, type, outdoor flag, coordinates and
+review count as metadata, so retrieval can pre-filter on the location and types
+the user asked for and rank only that subset by similarity. The embedded text is
+kept separate from the payload: hits are resolved to typed catalog records by
+URL, so nothing has to be parsed back out of the document text.
+"""
+
+import difflib
+import hashlib
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import Chroma
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "catalog"))
+from catalog import (CACHE_FILE, DATA_DIR, SOURCE_FILES, Attraction, AttractionCatalog, governorate,
+                     load_catalog, normalize)
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_index")
+COLLECTION_NAME = "attractions"
+EMBEDDING_MODEL = "BAAI/bge-base-en-v1.5"
+
+
+class LazyEmbeddings(Embeddings):
+    """Embedding model that is only loaded the first time something is embedded.
+
+    A warm start with nothing to re-embed never pays for loading the model;
+    it is loaded on the first query instead.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        self.model_name = model_name
+        self._model: Optional[Embeddings] = None
+
+    @property
+    def model(self) -> Embeddings:
+        if self._model is None:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
+
+
+def attraction_text(attraction: Attraction) -> str:
+    """Text that is embedded for an attraction; the record itself comes from the catalog."""
+    kind = attraction.type.replace("_", " ").rstrip("s")
+    parts = [
+        attraction.name,
+        f"{'Outdoor' if attraction.outdoor else 'Indoor'} {kind} in {attraction.location}",
+        attraction.description,
+    ]
+    if attraction.services:
+        parts.append("Services: " + "; ".join(attraction.services))
+    return "\n".join(part for part in parts if part)
+
+
+def attraction_metadata(attraction: Attraction) -> Dict[str, Any]:
+    """Filterable metadata of a catalog ``Attraction``; Chroma only accepts scalar values."""
+    metadata = {
+        "url": attraction.url,
+        "name": attraction.name,
+        "location": attraction.location,
+        "governorate": governorate(attraction.location),
+        "type": attraction.type,
+        "outdoor": attraction.outdoor,
+    }
+    if not math.isnan(attraction.lat) and not math.isnan(attraction.lon):
+        metadata["lat"] = attraction.lat
+        metadata["lon"] = attraction.lon
+    if attraction.reviews is not None:
+        metadata["reviews"] = attraction.reviews
+    return metadata
+
+
+def load_documents(catalog: AttractionCatalog) -> List[Document]:
+    """Build one document per catalog entry."""
+    return [Document(page_content=attraction_text(a), metadata=attraction_metadata(a)) for a in catalog]
+
+
+def content_hash(doc: Document, model_name: str = EMBEDDING_MODEL) -> str:
+    """Id of a document's embedding; changes when its text, metadata or the embedding model does."""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode())
+    digest.update(b"\0")
+    digest.update(doc.page_content.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(doc.metadata, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_filter(governorates: Optional[List[str]] = None, types: Optional[List[str]] = None,
+                 outdoor: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    """Chroma ``where`` clause matching every condition that is given."""
+    conditions = []
+    if governorates:
+        conditions.append({"governorate": {"$in": list(governorates)}})
+    if types:
+        conditions.append({"type": {"$in": list(types)}})
+    if outdoor is not None:
+        conditions.append({"outdoor": outdoor})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def unique_records(records: Iterable[Attraction]) -> List[Attraction]:
+    """Drop repeated records, keeping the first occurrence of each catalog id."""
+    seen = set()
+    unique = []
+    for record in records:
+        if record.id not in seen:
+            seen.add(record.id)
+            unique.append(record)
+    return unique
+
+
+def records_from_documents(catalog: AttractionCatalog, docs: Iterable[Document]) -> List[Attraction]:
+    """Resolve retrieved documents to unique catalog records, in rank order."""
+    records = (catalog.by_url(doc.metadata.get("url", "")) for doc in docs)
+    return unique_records(record for record in records if record is not None)
+
+
+def filter_with_threshold_limit(records: List[Attraction], threshold_reviews: int, target_amount: int,
+                                max_under_threshold: int) -> List[Attraction]:
+    """
+    Filters a list of records based on a reviews threshold.
+
+    First selects up to `max_under_threshold` records with fewer than threshold_reviews reviews,
+    then fills the rest (up to `target_amount`) with records at or above the threshold.
+    Records without a review count are skipped.
+
+    Parameters:
+    - records (list of Attraction): Retrieved catalog records, in rank order.
+    - threshold_reviews (int): Review count threshold.
+    - target_amount (int): Total number of records to return.
+    - max_under_threshold (int): Max number of records allowed below the threshold.
+
+    Returns:
+    - list: A list of up to `target_amount` records.
+    """
+    below = []
+    above_or_equal = []
+
+    for record in records:
+        if record.reviews is None:
+            continue
+        if record.reviews < threshold_reviews:
+            below.append(record)
+        else:
+            above_or_equal.append(record)
+
+    under = below[:max_under_threshold]
+    over = above_or_equal[:target_amount - len(under)]
+    return under + over
+
+
+class PersistentVectorIndex:
+    """Chroma collection persisted to ``persist_directory`` and synced by content hash."""
+
+    def __init__(self, catalog: AttractionCatalog, embedding: Optional[Embeddings] = None,
+                 persist_directory: str = INDEX_DIR, collection_name: str = COLLECTION_NAME,
+                 model_name: str = EMBEDDING_MODEL):
+        self.catalog = catalog
+        self.model_name = model_name
+        self.embedding = embedding or LazyEmbeddings(model_name)
+        self.store = Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embedding,
+            persist_directory=persist_directory,
+        )
+        # Normalized governorate / location name -> governorate
+        self._governorates: Dict[str, str] = {}
+        for location in catalog.location_names():
+            self._governorates.setdefault(normalize(governorate(location)), governorate(location))
+            self._governorates.setdefault(normalize(location), governorate(location))
+
+    def indexed_ids(self) -> set:
+        """Content hashes currently stored in the collection."""
+        return set(self.store.get(include=[])["ids"])
+
+    def sync(self, documents: List[Document]) -> Dict[str, int]:
+        """Embed documents that are not indexed yet and delete those no longer present.
+
+        Returns the number of ``added``, ``removed`` and ``unchanged`` documents.
+        A changed entry counts as one removal (its old hash) plus one addition.
+        """
+        wanted: Dict[str, Document] = {}
+        for doc in documents:
+            # Identical entries share one embedding
+            wanted.setdefault(content_hash(doc, self.model_name), doc)
+
+        existing = self.indexed_ids()
+        stale = [doc_id for doc_id in existing if doc_id not in wanted]
+        new_ids = [doc_id for doc_id in wanted if doc_id not in existing]
+
+        if stale:
+            self.store.delete(ids=stale)
+        if new_ids:
+            new_docs = [Document(page_content=wanted[doc_id].page_content,
+                                 metadata=dict(wanted[doc_id].metadata, content_hash=doc_id))
+                        for doc_id in new_ids]
+            self.store.add_documents(new_docs, ids=new_ids)
+
+        return {"added": len(new_ids), "removed": len(stale), "unchanged": len(wanted) - len(new_ids)}
+
+    def resolve_governorate(self, location: Optional[str]) -> Optional[str]:
+        """Map a free-text location ("luxr", "Karnak", "Luxor, Egypt") to an indexed governorate."""
+        if not location:
+            return None
+        key = normalize(location)
+        for candidate in [key] + key.replace(",", " ").split():
+            if candidate in self._governorates:
+                return self._governorates[candidate]
+            # Tolerate misspellings such as "luxr" or "aswn"
+            close = difflib.get_close_matches(candidate, list(self._governorates), n=1, cutoff=0.8)
+            if close:
+                return self._governorates[close[0]]
+        return None
+
+    def search(self, query: str, location: Optional[str] = None, types: Optional[List[str]] = None,
+               outdoor: Optional[bool] = None, k: int = 50) -> List[Document]:
+        """Rank by similarity only the documents in ``location`` with one of ``types``.
+
+        An unknown location or type is not used as a filter, and a filter that
+        matches nothing falls back to searching the whole collection.
+        """
+        resolved = self.resolve_governorate(location)
+        if location and resolved is None:
+            print(f"Warning: Unknown location {location!r}, searching all governorates")
+        types = [t for t in types or [] if t in SOURCE_FILES]
+        where = build_filter([resolved] if resolved else None, types, outdoor)
+
+        matching = len(self.store.get(where=where, include=[])["ids"]) if where else None
+        if matching == 0:
+            print(f"Warning: No attractions match {where}, searching all of them")
+            where = None
+        k = min(k, matching) if matching else k
+        return self.store.similarity_search(query, k=k, filter=where)
+
+    def retrieve(self, query: str, location: Optional[str] = None, types: Optional[List[str]] = None,
+                 outdoor: Optional[bool] = None, k: int = 50) -> List[Attraction]:
+        """Like :meth:`search`, but return the matching catalog records, deduplicated by id."""
+        return records_from_documents(self.catalog, self.search(query, location, types, outdoor, k))
+
+    def as_retriever(self, **kwargs):
+        return self.store.as_retriever(**kwargs)
+
+
+def open_index(data_dir: str = DATA_DIR, persist_directory: str = INDEX_DIR,
+               embedding: Optional[Embeddings] = None, verbose: bool = True) -> PersistentVectorIndex:
+    """Open the on-disk index and bring it in line with the current JSON files."""
+    # Only the default data directory has a catalog cache; others are cheap to build
+    catalog = load_catalog(data_dir, CACHE_FILE if os.path.abspath(data_dir) == os.path.abspath(DATA_DIR) else None)
+    index = PersistentVectorIndex(catalog, embedding, persist_directory)
+    counts = index.sync(load_documents(catalog))
+    if verbose:
+        print(f"Vector index: {counts['added']} embedded, {counts['removed']} removed, "
+              f"{counts['unchanged']} unchanged")
+    return index
@@ -0,0 +1,385 @@
+"""
+Shared LLM client for the agents.
+
+Every agent talks to DeepSeek's OpenAI-compatible chat completions endpoint through
+one ``LLMClient`` per (API key, base URL). It keeps a pooled HTTP session with
+timeouts and bounded retries, caches responses by content (messages, model,
+temperature and the other request parameters) with LRU and TTL eviction, and
+coalesces identical prompts that are in flight at the same time into one request.
+
+``DeepSeekLLM`` and ``DeepSeekChat`` wrap the shared client for LangChain: the
+former for ReAct agents and prompt chains, the latter for tool-calling agents.
+Point ``base_url`` at a local OpenAI-compatible server (see ``llm_stub.py``) to
+run the agents offline.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+DEFAULT_BASE_URL = "https://api.deepseek.com/v1"
+DEFAULT_MODEL = "deepseek-chat"
+
+# Status codes worth retrying; anything else is returned to the caller as an error
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """The chat completions request failed after all retries."""
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of responses with a time-to-live per entry."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return ``(result, shared)``, where ``shared`` is True if another caller made the call."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class LLMClient:
+    """Pooled, retrying, caching client for an OpenAI-compatible chat completions API."""
+
+    def __init__(self, api_key: str, base_url: str = DEFAULT_BASE_URL, model: str = DEFAULT_MODEL,
+                 timeout: float = 60.0, max_retries: int = 3, backoff_seconds: float = 0.5,
+                 max_backoff_seconds: float = 8.0, pool_size: int = 8,
+                 cache: Optional[ResponseCache] = None, use_cache: bool = True):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.cache = (cache if cache is not None else ResponseCache()) if use_cache else None
+        self._flights = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "cache_hits": 0, "coalesced": 0}
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def endpoint(self) -> str:
+        # Accept both ".../v1" and a full ".../v1/chat/completions" URL
+        if self.base_url.endswith("/chat/completions"):
+            return self.base_url
+        return f"{self.base_url}/chat/completions"
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    @staticmethod
+    def cache_key(payload: Dict[str, Any]) -> str:
+        """Content address of a request: identical payloads get identical keys."""
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.replace(".", "", 1).isdigit():
+                return min(float(retry_after), self.max_backoff_seconds)
+        # Exponential backoff with jitter, so coalesced clients do not retry in lockstep
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        last_error = ""
+        for attempt in range(self.max_retries + 1):
+            response = None
+            self._count("requests")
+            try:
+                response = self.session.post(self.endpoint, json=payload, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()["choices"][0]["message"]
+                last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = str(e)
+            except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+                raise LLMError(str(e)) from e
+
+            if attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(self._retry_delay(attempt, response))
+        raise LLMError(f"Giving up after {self.max_retries + 1} attempts: {last_error}")
+
+    def chat(self, messages: List[Dict[str, Any]], model: Optional[str] = None, temperature: float = 0.1,
+             max_tokens: Optional[int] = None, stop: Optional[List[str]] = None,
+             tools: Optional[List[Dict[str, Any]]] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """Send a chat completion request and return the assistant message dict.
+
+        Every caller gets its own copy of the message, so changing it does not touch the
+        cached answer or what coalesced callers receive. Raises ``LLMError`` if the
+        request still fails after the retries.
+        """
+        payload: Dict[str, Any] = {"model": model or self.model, "messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if stop:
+            payload["stop"] = list(stop)
+        if tools:
+            payload["tools"] = tools
+
+        key = self.cache_key(payload)
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                return copy.deepcopy(cached)
+
+        def fetch() -> Dict[str, Any]:
+            # A caller that waited on the cache may find the answer there now
+            if cache is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    return cached
+            message = self._post(payload)
+            if cache is not None:
+                cache.put(key, message)
+            return message
+
+        # The leader, its coalesced waiters and the cache all hold the same dict until it is copied here
+        message, shared = self._flights.do(key, fetch)
+        if shared:
+            self._count("coalesced")
+        return copy.deepcopy(message)
+
+    def complete(self, prompt: str, **kwargs: Any) -> str:
+        """Send a single user prompt and return the text of the answer."""
+        return self.chat([{"role": "user", "content": prompt}], **kwargs).get("content") or ""
+
+    async def achat(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        """Async :meth:`chat`; runs on a worker thread so it shares the pool, cache and coalescing."""
+        return await asyncio.to_thread(self.chat, messages, **kwargs)
+
+    async def acomplete(self, prompt: str, **kwargs: Any) -> str:
+        """Async :meth:`complete`."""
+        return await asyncio.to_thread(self.complete, prompt, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[Tuple[str, str], LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str, base_url: str = DEFAULT_BASE_URL, **kwargs: Any) -> LLMClient:
+    """The shared client for ``(api_key, base_url)``, created on first use.
+
+    ``kwargs`` are passed to ``LLMClient`` and only apply when the client is created.
+    """
+    key = (api_key, base_url.rstrip("/"))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = LLMClient(api_key, base_url, **kwargs)
+        return client
+
+
+class DeepSeekLLM(LLM):
+    """LangChain text LLM backed by the shared client, for ReAct agents and prompt chains."""
+
+    api_key: str
+    model: str = DEFAULT_MODEL
+    base_url: str = DEFAULT_BASE_URL
+    temperature: float = 0.1
+    max_tokens: int = 2048
+    use_cache: bool = True  # False sends every prompt, e.g. to retry an answer the caller rejected
+
+    def __init__(self, api_key: str, **kwargs: Any):
+        super().__init__(api_key=api_key, **kwargs)
+
+    @property
+    def client(self) -> LLMClient:
+        return get_client(self.api_key, self.base_url)
+
+    @property
+    def _llm_type(self) -> str:
+        return "deepseek"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "base_url": self.base_url, "temperature": self.temperature,
+                "max_tokens": self.max_tokens}
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        try:
+            return self.client.complete(prompt, model=self.model, temperature=self.temperature,
+                                        max_tokens=self.max_tokens, stop=stop, use_cache=self.use_cache)
+        except LLMError as e:
+            return f"Error calling DeepSeek API: {str(e)}"
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        try:
+            return await self.client.acomplete(prompt, model=self.model, temperature=self.temperature,
+                                               max_tokens=self.max_tokens, stop=stop, use_cache=self.use_cache)
+        except LLMError as e:
+            return f"Error calling DeepSeek API: {str(e)}"
+
+
+def _to_openai_message(message: BaseMessage) -> Dict[str, Any]:
+    if isinstance(message, SystemMessage):
+        return {"role": "system", "content": message.content}
+    if isinstance(message, ToolMessage):
+        return {"role": "tool", "content": message.content, "tool_call_id": message.tool_call_id}
+    if isinstance(message, AIMessage):
+        result: Dict[str, Any] = {"role": "assistant", "content": message.content}
+        if message.tool_calls:
+            result["tool_calls"] = [
+                {"id": call["id"], "type": "function",
+                 "function": {"name": call["name"], "arguments": json.dumps(call["args"])}}
+                for call in message.tool_calls
+            ]
+        return result
+    if isinstance(message, HumanMessage):
+        return {"role": "user", "content": message.content}
+    return {"role": "user", "content": str(message.content)}
+
+
+def _from_openai_message(message: Dict[str, Any]) -> AIMessage:
+    tool_calls = []
+    for call in message.get("tool_calls") or []:
+        try:
+            args = json.loads(call["function"].get("arguments") or "{}")
+        except json.JSONDecodeError:
+            args = {}
+        tool_calls.append({"name": call["function"]["name"], "args": args, "id": call.get("id")})
+    return AIMessage(content=message.get("content") or "", tool_calls=tool_calls)
+
+
+class DeepSeekChat(BaseChatModel):
+    """LangChain chat model backed by the shared client, with tool calling for tool-calling agents."""
+
+    api_key: str
+    model: str = DEFAULT_MODEL
+    base_url: str = DEFAULT_BASE_URL
+    temperature: float = 0.1
+    max_tokens: int = 2048
+    use_cache: bool = True  # False sends every prompt, e.g. to retry an answer the caller rejected
+
+    def __init__(self, api_key: str, **kwargs: Any):
+        super().__init__(api_key=api_key, **kwargs)
+
+    @property
+    def client(self) -> LLMClient:
+        return get_client(self.api_key, self.base_url)
+
+    @property
+    def _llm_type(self) -> str:
+        return "deepseek-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "base_url": self.base_url, "temperature": self.temperature,
+                "max_tokens": self.max_tokens}
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[str] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _request(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]):
+        return ([_to_openai_message(m) for m in messages],
+                {"model": self.model, "temperature": self.temperature, "max_tokens": self.max_tokens,
+                 "stop": stop, "tools": kwargs.get("tools"), "use_cache": kwargs.get("use_cache", self.use_cache)})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        openai_messages, params = self._request(messages, stop, kwargs)
+        message = self.client.chat(openai_messages, **params)
+        return ChatResult(generations=[ChatGeneration(message=_from_openai_message(message))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        openai_messages, params = self._request(messages, stop, kwargs)
+        message = await self.client.achat(openai_messages, **params)
+        return ChatResult(generations=[ChatGeneration(message=_from_openai_message(message))])
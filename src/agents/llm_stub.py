@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible chat completions server for running the agents offline.
+
+``OpenAICompatibleStub`` answers ``POST /v1/chat/completions`` with a canned or
+echoed reply after an optional delay, can fail the first requests with 503 to
+exercise retries, and counts the requests it receives. Running this file checks
+the shared client in ``llm_client.py`` against it: caching, coalescing of
+identical in-flight prompts, retries, the async API and both LangChain wrappers.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from llm_client import DeepSeekChat, DeepSeekLLM, LLMClient, LLMError, ResponseCache
+
+
+class OpenAICompatibleStub:
+    """Serves ``/v1/chat/completions`` on a free localhost port in a background thread.
+
+    ``reply`` maps the request payload to the answer text; by default the last
+    message is echoed back. When the request offers tools and no tool result is
+    in the conversation yet, the first tool is called with the last user message
+    as its ``query`` argument.
+    """
+
+    def __init__(self, reply: Optional[Callable[[Dict[str, Any]], str]] = None, delay: float = 0.0,
+                 fail_first: int = 0):
+        self.reply = reply or (lambda payload: f"echo: {payload['messages'][-1]['content']}")
+        self.delay = delay
+        self.fail_first = fail_first
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+                    failing = stub.requests <= stub.fail_first
+
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self._send(404, {"error": "not found"})
+                    return
+                time.sleep(stub.delay)
+                if failing:
+                    self._send(503, {"error": "overloaded"})
+                    return
+                self._send(200, {
+                    "id": f"stub-{stub.requests}",
+                    "object": "chat.completion",
+                    "model": payload.get("model"),
+                    "choices": [{"index": 0, "message": stub.message(payload), "finish_reason": "stop"}],
+                })
+
+            def _send(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def message(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        messages = payload.get("messages", [])
+        tools = payload.get("tools") or []
+        if tools and not any(m.get("role") == "tool" for m in messages):
+            user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+            return {"role": "assistant", "content": "", "tool_calls": [{
+                "id": "call-1", "type": "function",
+                "function": {"name": tools[0]["function"]["name"], "arguments": json.dumps({"query": user})},
+            }]}
+        return {"role": "assistant", "content": self.reply(payload)}
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check() -> None:
+    """Exercise the shared client against the stub and print what happened."""
+    stub = OpenAICompatibleStub(delay=0.2)
+    client = LLMClient("sk-test", stub.base_url, cache=ResponseCache(max_entries=4, ttl_seconds=60))
+
+    start = time.perf_counter()
+    first = client.complete("Plan a day in Luxor")
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    again = client.complete("Plan a day in Luxor")
+    warm = time.perf_counter() - start
+    assert first == again == "echo: Plan a day in Luxor"
+    print(f"Cache: first call {cold * 1000:.0f} ms, repeat {warm * 1000:.2f} ms, {stub.requests} request(s)")
+
+    before = stub.requests
+    with ThreadPoolExecutor(10) as pool:
+        answers = list(pool.map(lambda _: client.complete("Plan a day in Aswan"), range(10)))
+    assert len(set(answers)) == 1
+    print(f"Coalescing: 10 concurrent identical prompts -> {stub.requests - before} request(s)")
+
+    messages = [{"role": "user", "content": "Plan a day in Giza"}]
+    with ThreadPoolExecutor(4) as pool:
+        replies = list(pool.map(lambda _: client.chat(messages), range(4)))
+    replies[0]["content"] = "changed by a caller"
+    assert len({id(reply) for reply in replies}) == 4
+    assert replies[1]["content"] == client.chat(messages)["content"] == "echo: Plan a day in Giza"
+    print("Isolation: changing a returned message leaves the cache and coalesced callers untouched")
+
+    async def concurrent_prompts():
+        return await asyncio.gather(*(client.acomplete(f"Museum {i % 3}") for i in range(9)))
+    before = stub.requests
+    answers = asyncio.run(concurrent_prompts())
+    assert answers[0] == answers[3] == "echo: Museum 0"
+    print(f"Async: 9 prompts, 3 distinct -> {stub.requests - before} request(s)")
+    stub.close()
+
+    flaky = OpenAICompatibleStub(fail_first=2)
+    retrying = LLMClient("sk-test", flaky.base_url, backoff_seconds=0.05, use_cache=False)
+    assert retrying.complete("hello") == "echo: hello"
+    print(f"Retries: 2 x 503 then success, {retrying.stats['retries']} retries, {flaky.requests} requests")
+    down = OpenAICompatibleStub(fail_first=10)
+    giving_up = LLMClient("sk-test", down.base_url, max_retries=1, backoff_seconds=0.01, use_cache=False)
+    try:
+        giving_up.complete("hello")
+        raise AssertionError("expected LLMError")
+    except LLMError as e:
+        print(f"Bounded retries: {e}")
+    down.close()
+
+    llm = DeepSeekLLM(api_key="sk-test", base_url=flaky.base_url)
+    print(f"DeepSeekLLM: {llm.invoke('Which temples are in Luxor?')!r}")
+    before = flaky.requests
+    uncached = DeepSeekLLM(api_key="sk-test", base_url=flaky.base_url, use_cache=False)
+    uncached.invoke("Which temples are in Luxor?")
+    assert flaky.requests == before + 1
+    print("use_cache=False: a repeated prompt is sent again, e.g. to retry a rejected answer")
+
+    from langchain_core.tools import tool
+
+    @tool
+    def search(query: str) -> str:
+        """Search the web."""
+        return f"results for {query}"
+
+    chat = DeepSeekChat(api_key="sk-test", base_url=flaky.base_url).bind_tools([search])
+    call = chat.invoke("price of a papyrus")
+    print(f"DeepSeekChat tool call: {call.tool_calls[0]['name']}({call.tool_calls[0]['args']})")
+    flaky.close()
+
+
+if __name__ == "__main__":
+    check()
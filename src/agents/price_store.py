@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Reference prices for the ReasonablePrice agent.
+
+``PriceStore`` keeps the aggregated price range of an item in a city (low, high,
+currency, number of sources and when it was found) in ``price_store.json``,
+keyed by normalized item name and city, so that "obelisk" or "papyrus" is
+searched and aggregated once and then answered locally. Entries older than
+``refresh_after_days`` are refreshed on their next lookup (and served as they
+are if the refresh fails); entries older than ``expire_after_days`` are not
+served at all.
+
+``PriceEstimator`` answers lookups from the store and fills the gaps: it runs
+the web searches of all missing items concurrently and aggregates up to
+``batch_size`` items in one LLM call, so "prices for these 20 souvenirs" costs
+one aggregation instead of 20 agent runs. Running this file checks both
+against a local search function and the LLM stub in ``llm_stub.py``.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+DEFAULT_CITY = "Egypt"
+DEFAULT_CURRENCY = "EGP"
+SEARCH_RESULTS = 5
+SNIPPET_CHARS = 400  # Per search result in the aggregation prompt
+STORE_FORMAT_VERSION = 1
+
+# Words that do not change what is being priced ("a papyrus painting" is "papyrus painting")
+STOPWORDS = {"a", "an", "the", "of"}
+
+AGGREGATION_PROMPT = """You estimate reasonable prices that tourists pay in Egypt.
+For every item below you get up to {results} web search results. Aggregate the prices they mention into one
+reasonable range per item, in {currency} (convert other currencies at current rates). Ignore results that do
+not mention a price for the item; count the results you used as "sources". If no result mentions a price,
+give your best estimate and set "sources" to 0.
+
+Answer with a JSON array only, one object per item, in the same order:
+[{{"id": <id>, "low": <number>, "high": <number>, "currency": "{currency}", "sources": <number>}}]
+
+Items:
+{items}"""
+
+Search = Union[Callable[[str], Any], Any]
+
+
+class PriceError(Exception):
+    """A price could not be searched or aggregated."""
+
+
+def normalize(text: str) -> str:
+    """Case-, punctuation- and article-insensitive form, e.g. "The Papyrus-Paintings " -> "papyrus paintings"."""
+    words = re.sub(r"[^\w]+", " ", str(text).casefold()).split()
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+
+class PriceStore:
+    """On-disk store of aggregated price ranges keyed by normalized item name and city."""
+
+    def __init__(self, path: Optional[str] = "price_store.json", refresh_after_days: float = 30,
+                 expire_after_days: float = 180):
+        self.path = path
+        self.refresh_after_seconds = refresh_after_days * 86400
+        self.expire_after_seconds = expire_after_days * 86400
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("format") == STORE_FORMAT_VERSION:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable price store {path}: {e}")
+
+    @staticmethod
+    def key(item: str, city: str = DEFAULT_CITY) -> str:
+        return f"{normalize(item)}|{normalize(city)}"
+
+    def get(self, item: str, city: str = DEFAULT_CITY) -> Optional[Dict[str, Any]]:
+        """Stored range with its age in days and a "stale" flag, or None if missing or expired."""
+        entry = self.entries.get(self.key(item, city))
+        if entry is None:
+            return None
+        age = time.time() - entry["fetched_at"]
+        if age > self.expire_after_seconds:
+            return None
+        return {**entry, "age_days": round(age / 86400, 1), "stale": age > self.refresh_after_seconds}
+
+    def put(self, item: str, city: str, low: float, high: float, currency: str = DEFAULT_CURRENCY,
+            sources: int = 0) -> Dict[str, Any]:
+        entry = {
+            "item": item,
+            "city": city,
+            "low": float(min(low, high)),
+            "high": float(max(low, high)),
+            "currency": currency,
+            "sources": int(sources),
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            self.entries[self.key(item, city)] = entry
+        return entry
+
+    def due(self) -> List[Dict[str, Any]]:
+        """Entries older than refresh_after_days, e.g. to refresh them off the request path."""
+        now = time.time()
+        return [entry for entry in self.entries.values() if now - entry["fetched_at"] > self.refresh_after_seconds]
+
+    def evict_expired(self) -> int:
+        """Drop expired entries and return how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self.entries.items()
+                       if now - entry["fetched_at"] > self.expire_after_seconds]
+            for key in expired:
+                del self.entries[key]
+        return len(expired)
+
+    def save(self) -> None:
+        """Write the store atomically."""
+        if not self.path:
+            return
+        self.evict_expired()
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"format": STORE_FORMAT_VERSION, "entries": self.entries}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def search_results(search: Search, query: str) -> List[Dict[str, Any]]:
+    """Results of a TavilySearch tool (or any callable returning Tavily-shaped results) as a list of dicts."""
+    raw = search.invoke({"query": query}) if hasattr(search, "invoke") else search(query)
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return [{"content": raw}]
+    if isinstance(raw, dict):
+        raw = raw.get("results", [])
+    return [result for result in raw or [] if isinstance(result, dict)]
+
+
+def parse_ranges(text: str) -> List[Dict[str, Any]]:
+    """The JSON array of an aggregation answer, tolerating text or code fences around it."""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        raise PriceError(f"No JSON array in the aggregation answer: {text[:200]!r}")
+    try:
+        ranges = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise PriceError(f"Unreadable aggregation answer: {e}")
+    return [entry for entry in ranges if isinstance(entry, dict)]
+
+
+class PriceEstimator:
+    """
+    Reasonable price ranges from the store, searching and aggregating only what it lacks.
+
+    search is the TavilySearch tool of the notebook (or a function query -> results)
+    and llm any LangChain chat model or LLM, e.g. DeepSeekChat.
+    """
+
+    def __init__(self, search: Search, llm: Any, store: Optional[PriceStore] = None,
+                 max_results: int = SEARCH_RESULTS, batch_size: int = 20, search_workers: int = 8,
+                 currency: str = DEFAULT_CURRENCY):
+        self.search = search
+        self.llm = llm
+        self.store = store if store is not None else PriceStore()
+        self.max_results = max_results
+        self.batch_size = max(1, batch_size)
+        self.search_workers = search_workers
+        self.currency = currency
+        self.stats = {"hits": 0, "searches": 0, "aggregations": 0}
+
+    @staticmethod
+    def query(item: str, city: str) -> str:
+        where = "Egypt" if normalize(city) == normalize(DEFAULT_CITY) else f"{city}, Egypt"
+        return f"{item} price in {where}"
+
+    def price(self, item: str, city: str = DEFAULT_CITY) -> Dict[str, Any]:
+        """Price range of one item; see prices()."""
+        return self.prices([item], city)[0]
+
+    def prices(self, items: Sequence[str], city: str = DEFAULT_CITY) -> List[Dict[str, Any]]:
+        """
+        Price range of every item, in order: {"item", "city", "low", "high", "currency", "sources",
+        "fetched_at", "age_days", "stale"}, or {"item", "city", "error"} if it could not be found.
+
+        Fresh entries come from the store. Missing, expired and stale items are searched
+        concurrently and aggregated batch_size at a time; a stale entry whose refresh fails
+        is returned as stored. Items that normalize to the same key are looked up once.
+        """
+        answers: Dict[str, Dict[str, Any]] = {}
+        missing: Dict[str, str] = {}  # key -> item as first asked
+        for item in items:
+            key = self.store.key(item, city)
+            if key in answers or key in missing:
+                continue
+            stored = self.store.get(item, city)
+            if stored is not None and not stored["stale"]:
+                answers[key] = stored
+                self.stats["hits"] += 1
+            else:
+                missing[key] = item
+                if stored is not None:
+                    answers[key] = stored  # Served if the refresh fails
+
+        if missing:
+            found = self._fetch(list(missing.values()), city)
+            for key, item in missing.items():
+                if key in found:
+                    answers[key] = found[key]
+                elif key not in answers:
+                    answers[key] = {"item": item, "city": city, "error": found.get(f"error:{key}", "Not found")}
+            self.store.save()
+        return [answers[self.store.key(item, city)] for item in items]
+
+    def _fetch(self, items: List[str], city: str) -> Dict[str, Any]:
+        """Search and aggregate items; returns store entries by key, and "error:<key>" messages."""
+        def run(item: str):
+            try:
+                return search_results(self.search, self.query(item, city))[:self.max_results]
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.search_workers, len(items)))) as pool:
+            results = list(pool.map(run, items))
+        self.stats["searches"] += len(items)
+
+        found: Dict[str, Any] = {}
+        searched = []
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                print(f"❌ Search failed for {item}: {result}")
+                found[f"error:{self.store.key(item, city)}"] = f"Search failed: {result}"
+            else:
+                searched.append((item, result))
+
+        for start in range(0, len(searched), self.batch_size):
+            batch = searched[start:start + self.batch_size]
+            try:
+                ranges = self._aggregate(batch)
+            except Exception as e:
+                print(f"❌ Price aggregation failed for {len(batch)} item(s): {e}")
+                for item, _ in batch:
+                    found[f"error:{self.store.key(item, city)}"] = f"Aggregation failed: {e}"
+                continue
+            for i, (item, results) in enumerate(batch):
+                key = self.store.key(item, city)
+                entry = ranges.get(i)
+                try:
+                    low, high = float(entry["low"]), float(entry["high"])
+                except (TypeError, KeyError, ValueError):
+                    found[f"error:{key}"] = "No price range in the aggregation answer"
+                    continue
+                sources = min(int(entry.get("sources") or 0), len(results))
+                self.store.put(item, city, low, high, entry.get("currency") or self.currency, sources)
+                found[key] = self.store.get(item, city)
+        return found
+
+    def _aggregate(self, batch: List[tuple]) -> Dict[int, Dict[str, Any]]:
+        """One LLM call for a batch of (item, search results); ranges by position in the batch."""
+        items = [{
+            "id": i,
+            "item": item,
+            "results": [{
+                "title": result.get("title", ""),
+                "url": result.get("url", ""),
+                "content": str(result.get("content", ""))[:SNIPPET_CHARS],
+            } for result in results],
+        } for i, (item, results) in enumerate(batch)]
+        prompt = AGGREGATION_PROMPT.format(results=self.max_results, currency=self.currency,
+                                           items=json.dumps(items, ensure_ascii=False, indent=1))
+        answer = self.llm.invoke(prompt)
+        self.stats["aggregations"] += 1
+        ranges = parse_ranges(getattr(answer, "content", answer))
+        return {entry["id"]: entry for entry in ranges if isinstance(entry.get("id"), int)}
+
+
+def format_price(answer: Dict[str, Any]) -> str:
+    """One line per answer, e.g. "papyrus (Luxor): 150–400 EGP from 4 sources"."""
+    where = "" if normalize(answer["city"]) == normalize(DEFAULT_CITY) else f" ({answer['city']})"
+    if "error" in answer:
+        return f"{answer['item']}{where}: {answer['error']}"
+    stale = ", stale" if answer.get("stale") else ""
+    return (f"{answer['item']}{where}: {answer['low']:,.0f}–{answer['high']:,.0f} {answer['currency']} "
+            f"from {answer['sources']} source{'' if answer['sources'] == 1 else 's'}{stale}")
+
+
+SOUVENIRS = ["obelisk", "papyrus", "scarab", "cartouche pendant", "alabaster vase", "galabeya", "shisha",
+             "spices", "hibiscus tea", "cotton scarf", "Nefertiti bust", "Anubis statue", "camel leather bag",
+             "perfume bottle", "khan el khalili lantern", "mashrabiya box", "kohl", "evil eye bracelet",
+             "papyrus bookmark", "belly dance costume"]
+
+
+def check() -> None:
+    """Exercise the store and the estimator against local stand-ins for Tavily and DeepSeek."""
+    import tempfile
+
+    from llm_client import DeepSeekChat, get_client
+    from llm_stub import OpenAICompatibleStub
+
+    searched = []
+    lock = threading.Lock()
+
+    def search(query: str) -> Dict[str, Any]:
+        time.sleep(0.1)  # Roughly one Tavily round trip
+        with lock:
+            searched.append(query)
+        if query.startswith("broken"):
+            raise ConnectionError("search unavailable")
+        base = 50 + 10 * (sum(map(ord, query.casefold())) % 20)
+        return {"results": [{"title": f"{query} {i}", "url": f"https://example.com/{i}",
+                             "content": f"Prices from {base + 5 * i} to {2 * base + 5 * i} EGP"} for i in range(5)]}
+
+    def aggregate(payload: Dict[str, Any]) -> str:
+        """Range of the prices mentioned in each item's results, like a careful aggregator would answer."""
+        prompt = payload["messages"][-1]["content"]
+        items = json.loads(prompt[prompt.index("Items:") + len("Items:"):])
+        answer = []
+        for entry in items:
+            prices = [int(p) for result in entry["results"] for p in re.findall(r"\d+", result["content"])]
+            answer.append({"id": entry["id"], "low": min(prices), "high": max(prices), "currency": "EGP",
+                           "sources": len(entry["results"])})
+        return "```json\n" + json.dumps(answer) + "\n```"
+
+    stub = OpenAICompatibleStub(reply=aggregate, delay=0.2)
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "price_store.json")
+        llm = DeepSeekChat(api_key="sk-test", base_url=stub.base_url)
+        estimator = PriceEstimator(search, llm, PriceStore(path))
+
+        start = time.perf_counter()
+        first = estimator.price("Obelisk")
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        again = estimator.price("  the obelisk ")
+        warm = time.perf_counter() - start
+        assert again["low"] == first["low"] and again["sources"] == 5 and len(searched) == 1
+        print(f"Single item: first lookup {cold * 1000:.0f} ms, repeat {warm * 1000:.3f} ms; {format_price(again)}")
+
+        one_by_one = PriceEstimator(search, llm, PriceStore(None), batch_size=1, search_workers=1)
+        start = time.perf_counter()
+        for item in SOUVENIRS:
+            one_by_one.price(item)
+        serial = time.perf_counter() - start
+
+        before, calls = len(searched), stub.requests
+        start = time.perf_counter()
+        answers = estimator.prices(SOUVENIRS)
+        batch = time.perf_counter() - start
+        assert all("error" not in answer for answer in answers)
+        assert [a["low"] for a in answers] == [one_by_one.price(item)["low"] for item in SOUVENIRS]
+        print(f"20 souvenirs: one at a time {serial:.2f} s, batched {batch:.2f} s "
+              f"({len(searched) - before} concurrent searches, {stub.requests - calls} LLM call)")
+
+        reopened = PriceEstimator(search, llm, PriceStore(path))
+        before, calls = len(searched), stub.requests
+        answers = reopened.prices(SOUVENIRS + ["Papyrus"])
+        assert len(searched) == before and stub.requests == calls and answers[-1]["low"] == answers[1]["low"]
+        print(f"Reloaded store: {len(reopened.store)} entries, 21 lookups answered locally")
+
+        store = reopened.store
+        store.entries[store.key("papyrus")]["fetched_at"] -= 40 * 86400
+        before = len(searched)
+        refreshed = reopened.price("papyrus")
+        assert not refreshed["stale"] and len(searched) == before + 1
+        print("Staleness: a 40-day-old entry was searched and aggregated again")
+
+        store.entries[store.key("scarab")]["fetched_at"] -= 40 * 86400
+        down = OpenAICompatibleStub(fail_first=100)
+        get_client("sk-test", down.base_url, max_retries=0)
+        offline = PriceEstimator(search, DeepSeekChat(api_key="sk-test", base_url=down.base_url), store)
+        served = offline.prices(["scarab", "broken lamp"])
+        assert served[0]["stale"] and "error" in served[1]
+        print(f"Failures: {format_price(served[0])}; {format_price(served[1])}")
+        down.close()
+    stub.close()
+
+
+if __name__ == "__main__":
+    check()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Parallel booking executor for EgyMonuments.
+
+Entries from ``booking_details.json`` are grouped by location and date and
+spread over a pool of headless Chrome sessions. Each session has its own
+cookies and therefore its own cart: it jumps straight to each booking page
+through the shared location index (see location_index.py), adds the entry,
+and checks out its cart at the end. The outcome of every entry is written to
+a JSON report.
+"""
+
+import argparse
+import functools
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+from location_index import INDEX_FILE, LocationIndex
+from main_booking import complete_checkout
+from web_utils import BookingError, book_location, load_bookings, web_driver
+
+BOOKER_DIR = os.path.dirname(os.path.abspath(__file__))
+BOOKINGS_FILE = os.path.join(BOOKER_DIR, "booking_details.json")
+REPORT_FILE = os.path.join(BOOKER_DIR, "booking_report.json")
+SITE_URL = "https://egymonuments.com"
+DEFAULT_SESSIONS = 4
+DEFAULT_TIMEOUT = 10  # Upper bound for each wait; waits return as soon as the element is there
+POLL_SECONDS = 0.1
+
+
+@dataclass
+class EntryResult:
+    """Outcome of one booking entry.
+
+    status is "checked_out" (added to the cart and the cart reached checkout),
+    "checkout_failed" (added, but the session's checkout failed), "in_cart"
+    (added, checkout disabled) or "failed" (not added; see error).
+    """
+    index: int  # Position in the bookings file
+    location: str
+    date: str
+    session: int
+    status: str
+    error: Optional[str] = None
+    seconds: float = 0.0
+    checkout_url: Optional[str] = None
+
+
+def _short_error(e: WebDriverException) -> str:
+    return (e.msg or type(e).__name__).splitlines()[0]
+
+
+def group_bookings(entries: List[Dict[str, Any]]) -> List[List[Tuple[int, Dict[str, Any]]]]:
+    """Group entries by (location, date), keeping file order inside a group; largest groups first."""
+    groups: Dict[Tuple[str, str], List[Tuple[int, Dict[str, Any]]]] = {}
+    for index, entry in enumerate(entries):
+        key = (entry.get("location", "").strip().lower(), str(entry.get("date", "")))
+        groups.setdefault(key, []).append((index, entry))
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def headless_driver_factory() -> Callable[[], Any]:
+    """Factory for headless Chrome sessions that installs chromedriver once rather than once per session."""
+    return functools.partial(web_driver, headless=True, driver_path=ChromeDriverManager().install())
+
+
+class BookingExecutor:
+    """Books entries across ``sessions`` independent browser sessions.
+
+    ``factory`` creates one WebDriver per session (headless Chrome by default).
+    Groups are handed out from a shared queue, so a session that finishes early
+    picks up the next group instead of idling. ``location_index`` defaults to
+    the persisted index for ``site_url``.
+    """
+
+    def __init__(self, sessions: int = DEFAULT_SESSIONS, site_url: str = SITE_URL, timeout: float = DEFAULT_TIMEOUT,
+                 factory: Optional[Callable[[], Any]] = None, checkout: bool = True,
+                 location_index: Optional[LocationIndex] = None):
+        self.sessions = max(1, sessions)
+        self.site_url = site_url.rstrip("/")
+        self.timeout = timeout
+        self.factory = factory
+        self.checkout = checkout
+        self.location_index = location_index or LocationIndex(site_url=self.site_url)
+        self._lock = threading.Lock()
+
+    def run(self, entries: List[Dict[str, Any]]) -> List[EntryResult]:
+        """Book every entry and return one result per entry, in file order."""
+        groups = group_bookings(entries)
+        if not groups:
+            return []
+        if self.factory is None:
+            self.factory = headless_driver_factory()
+
+        pending = queue.Queue()
+        for group in groups:
+            pending.put(group)
+        results: List[EntryResult] = []
+        with ThreadPoolExecutor(max_workers=min(self.sessions, len(groups))) as pool:
+            for session_results in pool.map(lambda session: self._run_session(session, pending),
+                                            range(1, min(self.sessions, len(groups)) + 1)):
+                results.extend(session_results)
+        return sorted(results, key=lambda result: result.index)
+
+    def _run_session(self, session: int, pending: queue.Queue) -> List[EntryResult]:
+        results: List[EntryResult] = []
+        try:
+            driver = self.factory()
+        except Exception as e:
+            # Without a browser this session books nothing; its share of the groups goes to the others
+            print(f"❌ Session {session} could not start a browser: {e}")
+            return results
+
+        wait = WebDriverWait(driver, self.timeout, poll_frequency=POLL_SECONDS)
+        try:
+            while True:
+                try:
+                    group = pending.get_nowait()
+                except queue.Empty:
+                    break
+                results.extend(self._book_group(driver, wait, session, group))
+
+            booked = [result for result in results if result.status == "in_cart"]
+            if booked and self.checkout:
+                checked_out = complete_checkout(driver, wait)
+                for result in booked:
+                    result.status = "checked_out" if checked_out else "checkout_failed"
+                    result.checkout_url = driver.current_url if checked_out else None
+        except WebDriverException as e:
+            print(f"❌ Session {session} browser error: {e}")
+            for result in results:
+                if result.status == "in_cart" and self.checkout:
+                    result.status, result.error = "checkout_failed", _short_error(e)
+        finally:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        return results
+
+    def _book_group(self, driver, wait, session: int, group: List[Tuple[int, Dict[str, Any]]]) -> List[EntryResult]:
+        """Add every entry of one (location, date) group to this session's cart."""
+        results = []
+        for index, entry in group:
+            start = time.perf_counter()
+            result = EntryResult(index=index, location=entry.get("location", ""), date=str(entry.get("date", "")),
+                                 session=session, status="failed")
+            try:
+                book_location(driver, wait, entry, self.location_index)
+                result.status = "in_cart"
+            except (BookingError, KeyError) as e:
+                result.error = str(e)
+            except WebDriverException as e:
+                result.error = _short_error(e)
+            result.seconds = time.perf_counter() - start
+            with self._lock:
+                mark = "✅" if result.status == "in_cart" else "❌"
+                print(f"{mark} [session {session}] Booking {index + 1} ({result.location}): "
+                      f"{result.error or 'added to cart'}")
+            results.append(result)
+        return results
+
+
+def build_report(results: List[EntryResult], total: int, seconds: float, sessions: int) -> Dict[str, Any]:
+    """Machine-readable report: a summary plus one record per entry."""
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    reported = {result.index for result in results}
+    missing = [EntryResult(index=i, location="", date="", session=0, status="failed", error="Not attempted")
+               for i in range(total) if i not in reported]
+    if missing:
+        counts["failed"] = counts.get("failed", 0) + len(missing)
+    return {
+        "summary": {"entries": total, "sessions": sessions, "seconds": round(seconds, 3), **counts},
+        "entries": [asdict(result) for result in sorted(results + missing, key=lambda r: r.index)],
+    }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def main():
+    """Main entry point with argument parsing."""
+    parser = argparse.ArgumentParser(description="Book EgyMonuments tickets across parallel headless sessions")
+    parser.add_argument("--bookings", default=BOOKINGS_FILE, help="Booking entries (default: booking_details.json)")
+    parser.add_argument("--report", default=REPORT_FILE, help="Where to write the JSON report")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="Number of parallel browser sessions")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Maximum seconds to wait for a page element")
+    parser.add_argument("--site-url", default=SITE_URL, help="Base URL of the booking site")
+    parser.add_argument("--no-checkout", action="store_true", help="Only fill the carts, do not proceed to checkout")
+    parser.add_argument("--refresh-index", action="store_true",
+                        help="Re-scrape the locations page even if location_index.json is still fresh")
+    parser.add_argument("--mock", action="store_true",
+                        help="Run against a local mock of the site (see mock_site.py) and verify the carts")
+    parser.add_argument("--mock-delay", type=float, default=0.2, help="Seconds of latency per mock page")
+    args = parser.parse_args()
+
+    entries = load_bookings(args.bookings)
+    print(f"Loaded {len(entries)} booking entries, {len(group_bookings(entries))} location/date groups")
+
+    site = None
+    site_url = args.site_url
+    index_file = INDEX_FILE
+    if args.mock:
+        from mock_site import MockEgyMonuments
+        site = MockEgyMonuments(delay=args.mock_delay)
+        site_url = site.base_url
+        index_file = None  # Keep the mock's locations out of the real index
+
+    location_index = LocationIndex(index_file, site_url)
+    if args.refresh_index:
+        location_index.expire()
+    executor = BookingExecutor(args.sessions, site_url, args.timeout, checkout=not args.no_checkout,
+                               location_index=location_index)
+    start = time.perf_counter()
+    results = executor.run(entries)
+    elapsed = time.perf_counter() - start
+
+    report = build_report(results, len(entries), elapsed, executor.sessions)
+    write_report(report, args.report)
+    print(f"\n{'='*50}")
+    print("BOOKING SUMMARY")
+    print(f"{'='*50}")
+    for key, value in report["summary"].items():
+        print(f"{key}: {value}")
+    print(f"Report written to {args.report}")
+
+    if site is not None:
+        booked = site.booked_items()
+        expected = sum(1 for result in results if result.status == "checked_out")
+        print(f"Mock site: {len(site.orders)} carts checked out with {len(booked)} items (expected {expected})")
+        site.close()
+
+
+if __name__ == "__main__":
+    main()
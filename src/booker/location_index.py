@@ -0,0 +1,202 @@
+"""
+Cached index of EgyMonuments booking locations.
+
+The locations page is scraped once with a single script call into
+``{name: location URL}``; the booking page URL of a location is recorded the
+first time it is opened. Both are kept in ``location_index.json`` with a TTL,
+so later bookings jump straight to the booking page instead of walking the
+locations list and comparing every element's text. Names are matched on a
+normalized key with aliases for the catalog's names (``"Giza Necropolis"``,
+``"Manial Palace Museum"``). A name that matches neither is an error listing the
+closest locations, never a guess: "Grand Egyptian Museum" must not book the
+"Egyptian Museum".
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from web_utils import LOCATION_SELECTOR, BookingError, click_book_now, open_booking_page
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "location_index.json")
+SITE_URL = "https://egymonuments.com"
+DEFAULT_TTL_SECONDS = 7 * 86400
+INDEX_FORMAT_VERSION = 1
+
+# Words that do not tell two locations apart ("The Coptic Museum" is the booking site's "Coptic Museum")
+STOPWORDS = {"the", "of", "in", "al", "el"}
+
+# Catalog and common names -> name on the booking site
+ALIASES = {
+    "Giza Necropolis": "Giza Plateau",
+    "Pyramids of Giza": "Giza Plateau",
+    "Giza Pyramids": "Giza Plateau",
+    "Manial Palace Museum": "Prince Mohamed Aly Palace",
+    "Manial Palace": "Prince Mohamed Aly Palace",
+    "The towers Citadel of Salah al-Din Ayyubi": "Salah Eldin Citadel",
+    "Cairo Citadel": "Salah Eldin Citadel",
+    "Citadel of Saladin": "Salah Eldin Citadel",
+    "Bab Zuweila": "Bab Zuwaila",
+    "Museum of Islamic Art": "Islamic Art Museum",
+}
+
+# One round trip for the whole list: each location's name and the link it sits in, if any
+SCRAPE_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (element) {
+    var link = element.closest('a');
+    return [element.textContent.trim(), link ? link.href : null];
+});
+"""
+
+
+def name_key(name: str) -> str:
+    """Order- and punctuation-insensitive key, e.g. "Museum of Islamic Art" -> "art islamic museum"."""
+    words = re.sub(r"[^\w]+", " ", name.casefold()).split()
+    return " ".join(sorted(word for word in words if word not in STOPWORDS))
+
+
+ALIAS_KEYS = {name_key(alias): name_key(target) for alias, target in ALIASES.items()}
+
+
+class LocationIndex:
+    """Booking-site location names with their location and booking page URLs.
+
+    ``open_booking_page`` refreshes the index when it is older than
+    ``ttl_seconds`` (or misses a name that a fresh scrape might have), resolves
+    the booking URL of a location once and then navigates straight to it. Safe
+    to share between the sessions of the booking executor.
+    """
+
+    def __init__(self, path: Optional[str] = INDEX_FILE, site_url: str = SITE_URL,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.site_url = site_url.rstrip("/")
+        self.ttl_seconds = ttl_seconds
+        self.scraped_at = 0.0
+        self.locations: Dict[str, Dict[str, Any]] = {}  # name_key -> {"name", "url", "booking_url"}
+        self._refreshed = False  # Scraped by this process, so a missing name is really missing
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("format") == INDEX_FORMAT_VERSION and data.get("site_url") == self.site_url:
+                    self.scraped_at = data.get("scraped_at", 0.0)
+                    self.locations = data.get("locations", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable location index {path}: {e}")
+
+    def is_stale(self) -> bool:
+        return not self.locations or time.time() - self.scraped_at > self.ttl_seconds
+
+    def expire(self) -> None:
+        """Mark the index stale so the next lookup scrapes the locations page again."""
+        self.scraped_at = 0.0
+
+    def refresh(self, driver) -> int:
+        """Scrape the locations page into the index and return the number of locations."""
+        driver.get(f"{self.site_url}/locations")
+        rows = driver.execute_script(SCRAPE_SCRIPT, LOCATION_SELECTOR) or []
+        locations = {}
+        for name, url in rows:
+            key = name_key(name)
+            if not key:
+                continue
+            previous = self.locations.get(key, {})
+            # Keep a known booking URL as long as the location page it came from has not moved
+            booking_url = previous.get("booking_url") if previous.get("url") == url else None
+            locations[key] = {"name": name, "url": url, "booking_url": booking_url}
+        with self._lock:
+            self.locations = locations
+            self.scraped_at = time.time()
+            self._refreshed = True
+            self._save()
+        print(f"Indexed {len(locations)} booking locations")
+        return len(locations)
+
+    def resolve(self, name: str) -> Optional[Dict[str, Any]]:
+        """Index entry for a booking-site or catalog name, by exact key or alias only."""
+        key = name_key(name)
+        key = key if key in self.locations else ALIAS_KEYS.get(key, key)
+        return self.locations.get(key)
+
+    def close_names(self, name: str, n: int = 3) -> List[str]:
+        """Booking-site names resembling name, for the error message of a failed lookup."""
+        close = difflib.get_close_matches(name_key(name), list(self.locations), n=n, cutoff=0.6)
+        return [self.locations[key]["name"] for key in close]
+
+    def _ensure(self, driver, name: str) -> Dict[str, Any]:
+        with self._refresh_lock:
+            if self.is_stale():
+                self.refresh(driver)
+            entry = self.resolve(name)
+            if entry is None and not self._refreshed:
+                self.refresh(driver)
+                entry = self.resolve(name)
+        if entry is None:
+            close = self.close_names(name)
+            hint = (f"; closest booking-site names: {', '.join(repr(c) for c in close)} (add an ALIASES entry if one is "
+                    "the same site)" if close else "")
+            raise BookingError(f"Location '{name}' not found{hint}")
+        return entry
+
+    def booking_url(self, driver, wait, name: str) -> str:
+        """Booking page URL of a location, visiting its location page the first time only."""
+        entry = self._ensure(driver, name)
+        if entry.get("booking_url"):
+            return entry["booking_url"]
+        if entry.get("url"):
+            driver.get(entry["url"])
+            booking_url = click_book_now(driver, wait)
+        else:
+            # Locations that are not plain links are clicked through from the list, once
+            driver.get(f"{self.site_url}/locations")
+            booking_url = open_booking_page(driver, wait, entry["name"])
+        with self._lock:
+            entry["booking_url"] = booking_url
+            self._save()
+        return booking_url
+
+    def open_booking_page(self, driver, wait, name: str) -> str:
+        """Navigate straight to a location's booking page and return its URL."""
+        url = self.booking_url(driver, wait, name)
+        if driver.current_url != url:
+            driver.get(url)
+        try:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input.plus")))
+        except TimeoutException:
+            # The site moved the page; resolve it again next time
+            self.forget(name)
+            raise BookingError(f"Booking page for '{name}' did not load from {url}")
+        print("Opened booking page URL:", url)
+        return url
+
+    def forget(self, name: str) -> None:
+        """Drop the cached booking URL of a location."""
+        entry = self.resolve(name)
+        if entry is not None:
+            with self._lock:
+                entry["booking_url"] = None
+                self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "format": INDEX_FORMAT_VERSION,
+                "site_url": self.site_url,
+                "scraped_at": self.scraped_at,
+                "locations": self.locations,
+            }, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
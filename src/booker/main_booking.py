@@ -6,12 +6,17 @@ from web_utils.py to perform the complete booking workflow.
 """
 
 import json
+import os
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 # Import our web utilities
 from web_utils import web_driver, load_bookings, book_location
+from location_index import LocationIndex
+
+LOCATIONS_URL = 'https://egymonuments.com/locations'
+BOOKINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "booking_details.json")
 
 
 def complete_checkout(driver, wait):
@@ -55,16 +60,16 @@ def main():
     # Initialize WebDriver
     driver = web_driver()
     wait = WebDriverWait(driver, 10)
+    location_index = LocationIndex()
     
     try:
         # Navigate to the locations page
-        driver.get('https://egymonuments.com/locations')
+        driver.get(LOCATIONS_URL)
         print("Navigated to EgyMonuments locations page")
         
         # Load booking data from JSON file
         try:
-            with open("planning_agent/booking_details.json", "r") as f:
-                booking_data = json.load(f)
+            booking_data = load_bookings(BOOKINGS_FILE)
             print(f"Loaded {len(booking_data)} booking entries")
         except FileNotFoundError:
             print("❌ Error: booking_details file not found")
@@ -82,7 +87,8 @@ def main():
             print(f"Location: {entry.get('location', 'Unknown')}")
             
             try:
-                book_location(driver, wait, entry)
+                # The cached location index opens each booking page directly, wherever the browser is
+                book_location(driver, wait, entry, location_index)
                 successful_bookings += 1
                 print(f"✅ Booking {i} completed successfully")
             except Exception as e:
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Local mock of the EgyMonuments booking pages.
+
+``MockEgyMonuments`` serves the locations list, a page per location with its
+Book Now link, the booking page (nationality buttons, date picker, ticket
+counters and Add to Cart), the cart and the checkout, using the selectors
+that ``web_utils.py`` and ``main_booking.py`` look for. Each browser session
+gets its own cart through a cookie, and checked-out carts are recorded in
+``orders`` so a run of the booking executor can be verified. Running this
+file walks the pages over plain HTTP as a quick self-check.
+"""
+
+import html
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import requests
+
+DEFAULT_LOCATIONS = [
+    "Giza Plateau",
+    "Egyptian Museum",
+    "Prince Mohamed Aly Palace",
+    "Salah Eldin Citadel",
+    "Bab Zuwaila",
+    "Coptic Museum",
+    "Baron Empain Palace",
+    "Islamic Art Museum",
+]
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title></head>
+<body>
+<div class="pull-right" onclick="window.location.href='/cart'">CART ({items})</div>
+{body}
+</body></html>"""
+
+BOOKING_FORM = """<h1>{name}</h1>
+<form method="post" action="/cart/add">
+  <input type="hidden" name="location" value="{name}">
+  <input type="hidden" name="nationality" id="nationality" value="">
+  <input type="hidden" name="adults" id="adults" value="0">
+  <input type="hidden" name="students" id="students" value="0">
+  <button type="button" onclick="document.getElementById('nationality').value='egyptian'">Egyptian / Arab</button>
+  <button type="button" onclick="document.getElementById('nationality').value='other'">Other Nationality</button>
+  <table class="calendar"><tr>{days}</tr></table>
+  <input type="text" name="date" id="selectedDate" value="" readonly>
+  <div>Adults <input type="button" class="plus" value="+" onclick="var a=document.getElementById('adults'); a.value=+a.value+1"></div>
+  <div>Students <input type="button" class="plus" value="+" onclick="var s=document.getElementById('students'); s.value=+s.value+1"></div>
+  <button type="submit" id="button1">Add to cart &amp; continue booking</button>
+</form>"""
+
+
+def day_keys(start: str, days: int) -> List[str]:
+    """Date keys as used by the site's date picker: UTC midnight in epoch milliseconds."""
+    first = datetime.strptime(start, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return [str(int((first + timedelta(days=i)).timestamp() * 1000)) for i in range(days)]
+
+
+class MockEgyMonuments:
+    """Serves the booking flow on a free localhost port in a background thread.
+
+    ``delay`` seconds are added to every response to mimic the live site's
+    latency. ``orders`` lists the checked-out carts as
+    ``{"session": ..., "items": [...]}`` and ``requests`` counts the pages served.
+    """
+
+    def __init__(self, locations: Optional[List[str]] = None, start_date: str = "2025-08-01", days: int = 31,
+                 delay: float = 0.0):
+        self.locations = list(locations or DEFAULT_LOCATIONS)
+        self.dates = day_keys(start_date, days)
+        self.delay = delay
+        self.carts: Dict[str, List[Dict[str, Any]]] = {}
+        self.orders: List[Dict[str, Any]] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site._count()
+                session = self._session()
+                path = unquote(urlparse(self.path).path).rstrip("/")
+                if path == "/locations":
+                    links = "\n".join(
+                        f'<a href="/locations/{quote(name)}"><div class="p-2 w-100 align-self-center">'
+                        f'{html.escape(name)}</div></a>' for name in site.locations
+                    )
+                    self._page(session, "Locations", links)
+                elif path.startswith("/locations/") and path[len("/locations/"):] in site.locations:
+                    name = path[len("/locations/"):]
+                    body = f'<h1>{html.escape(name)}</h1><a class="btn-get-download" href="/book/{quote(name)}">Book Now</a>'
+                    self._page(session, name, body)
+                elif path.startswith("/book/") and path[len("/book/"):] in site.locations:
+                    name = path[len("/book/"):]
+                    days = "".join(
+                        f'<td class="day" data-date="{key}" '
+                        f'onclick="document.getElementById(\'selectedDate\').value=\'{key}\'">{i + 1}</td>'
+                        for i, key in enumerate(site.dates)
+                    )
+                    self._page(session, f"Book {name}", BOOKING_FORM.format(name=html.escape(name), days=days))
+                elif path == "/cart":
+                    items = site.cart(session)
+                    rows = "".join(
+                        f"<li>{html.escape(item['location'])} {item['date']}: {item['adults']} adults, "
+                        f"{item['students']} students ({html.escape(item['nationality'])})</li>" for item in items
+                    )
+                    body = (f"<ul>{rows}</ul><form method=\"post\" action=\"/checkout\">"
+                            f"<button type=\"submit\" class=\"btn btn-cart-next\">Checkout</button></form>")
+                    self._page(session, "Cart", body)
+                elif path == "/checkout/done":
+                    self._page(session, "Checkout", "<h1>Payment</h1>")
+                else:
+                    self._send(404, session, "<h1>Not found</h1>")
+
+            def do_POST(self):
+                site._count()
+                session = self._session()
+                length = int(self.headers.get("Content-Length", 0))
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+                path = urlparse(self.path).path.rstrip("/")
+                if path == "/cart/add":
+                    item = {
+                        "location": form.get("location", ""),
+                        "date": form.get("date", ""),
+                        "adults": int(form.get("adults", 0)),
+                        "students": int(form.get("students", 0)),
+                        "nationality": form.get("nationality", ""),
+                    }
+                    if item["date"] not in site.dates or item["adults"] + item["students"] == 0:
+                        self._send(400, session, "<h1>Invalid booking</h1>")
+                        return
+                    with site._lock:
+                        site.carts.setdefault(session, []).append(item)
+                    self._redirect(session, "/locations")
+                elif path == "/checkout":
+                    with site._lock:
+                        items = site.carts.pop(session, [])
+                        if items:
+                            site.orders.append({"session": session, "items": items})
+                    self._redirect(session, "/checkout/done")
+                else:
+                    self._send(404, session, "<h1>Not found</h1>")
+
+            def _session(self) -> str:
+                for part in self.headers.get("Cookie", "").split(";"):
+                    key, _, value = part.strip().partition("=")
+                    if key == "sid" and value:
+                        return value
+                return uuid.uuid4().hex
+
+            def _page(self, session: str, title: str, body: str) -> None:
+                items = len(site.cart(session))
+                self._send(200, session, PAGE.format(title=html.escape(title), items=items, body=body))
+
+            def _send(self, status: int, session: str, text: str) -> None:
+                time.sleep(site.delay)
+                data = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Set-Cookie", f"sid={session}; Path=/")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _redirect(self, session: str, location: str) -> None:
+                time.sleep(site.delay)
+                self.send_response(303)
+                self.send_header("Location", location)
+                self.send_header("Set-Cookie", f"sid={session}; Path=/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def cart(self, session: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.carts.get(session, []))
+
+    def booked_items(self) -> List[Dict[str, Any]]:
+        """Every checked-out item across all sessions."""
+        with self._lock:
+            return [item for order in self.orders for item in order["items"]]
+
+    def _count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check() -> None:
+    """Walk locations -> book now -> cart -> checkout with two independent sessions."""
+    site = MockEgyMonuments()
+    sessions = [requests.Session(), requests.Session()]
+    for i, session in enumerate(sessions):
+        page = session.get(f"{site.base_url}/locations").text
+        assert "align-self-center" in page and "Giza Plateau" in page
+        page = session.get(f"{site.base_url}/locations/{quote('Giza Plateau')}").text
+        assert "btn-get-download" in page
+        page = session.get(f"{site.base_url}/book/{quote('Giza Plateau')}").text
+        assert f'data-date="{site.dates[9]}"' in page and 'id="button1"' in page
+        form = {"location": "Giza Plateau", "date": site.dates[9], "adults": i + 1, "students": 0,
+                "nationality": "egyptian"}
+        assert "CART (1)" in session.post(f"{site.base_url}/cart/add", data=form).text
+        assert "btn-cart-next" in session.get(f"{site.base_url}/cart").text
+        session.post(f"{site.base_url}/checkout")
+    assert [len(order["items"]) for order in site.orders] == [1, 1]
+    assert sorted(item["adults"] for item in site.booked_items()) == [1, 2]
+    print(f"Mock site OK: {len(site.orders)} independent carts checked out, {site.requests} requests served")
+    site.close()
+
+
+if __name__ == "__main__":
+    check()
@@ -12,20 +12,39 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+# One element per location on the locations page, its text is the location name
+LOCATION_SELECTOR = "div.p-2.w-100.align-self-center"
 
-def web_driver():
+
+class BookingError(Exception):
+    """A booking step failed; the message says which one."""
+
+
+def web_driver(headless=False, driver_path=None):
     """
     Create and configure a Chrome WebDriver instance.
     
+    Args:
+        headless (bool): Run Chrome without a window (used by the parallel booking executor)
+        driver_path (str): Path to chromedriver; installed with webdriver_manager when omitted
+        
     Returns:
         webdriver.Chrome: Configured Chrome WebDriver instance
     """
     options = webdriver.ChromeOptions()
-    options.add_argument('--start-maximized')
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+    else:
+        options.add_argument('--start-maximized')
+    service = Service(driver_path or ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=options)
     return driver
 
 
@@ -57,7 +76,7 @@ def find_location_button(driver, wait, location_name):
     """
     try:
         location_elements = wait.until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.p-2.w-100.align-self-center"))
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, LOCATION_SELECTOR))
         )
     except Exception:
         print("❌ Could not find any location elements.")
@@ -92,69 +111,130 @@ def select_nationality(driver, nationality):
         print("Nationality selection button not found.")
 
 
-def book_location(driver, wait, entry):
+def open_booking_page(driver, wait, location_name):
     """
-    Automate the booking process for a single entry.
+    Go from the locations list to the booking page of a location.
     
     Args:
-        driver: Selenium WebDriver instance
+        driver: Selenium WebDriver instance, on the locations page
+        wait: WebDriverWait instance
+        location_name (str): Name of the location to book
+        
+    Returns:
+        str: URL of the booking page, so later entries for the same location can open it directly
+        
+    Raises:
+        BookingError: If the location or its Book Now button is not found
+    """
+    # Step 1: Find and click location
+    location_button = find_location_button(driver, wait, location_name)
+    if not location_button:
+        raise BookingError(f"Location '{location_name}' not found")
+    driver.execute_script("arguments[0].click();", location_button)
+    print("New page URL (via JS click):", driver.current_url)
+    return click_book_now(driver, wait)
+
+
+def click_book_now(driver, wait):
+    """
+    Click "Book Now" on a location page and wait for the booking page.
+    
+    Args:
+        driver: Selenium WebDriver instance, on a location page
+        wait: WebDriverWait instance
+        
+    Returns:
+        str: URL of the booking page
+        
+    Raises:
+        BookingError: If the Book Now button is missing or the booking page does not load
+    """
+    # Step 2: Click "Book Now"
+    try:
+        book_now_button = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a.btn-get-download")))
+    except TimeoutException:
+        raise BookingError("Book Now button not found")
+    driver.execute_script("arguments[0].click();", book_now_button)
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input.plus")))
+    except TimeoutException:
+        raise BookingError("Booking page did not load")
+    print("Redirected to booking page URL:", driver.current_url)
+    return driver.current_url
+
+
+def fill_booking(driver, wait, entry):
+    """
+    Fill in the booking page for one entry and add it to the cart.
+    
+    Args:
+        driver: Selenium WebDriver instance, on the booking page of entry["location"]
         wait: WebDriverWait instance
         entry (dict): Dictionary containing booking information with keys:
                      'location', 'date', 'adults', 'students', 'nationality'
+        
+    Raises:
+        BookingError: If the date is not selectable or the ticket controls are missing
     """
-    location_name = entry["location"]
     target_date = entry["date"]  # e.g., "1754784000000"
     adults = entry["adults"]
     students = entry["students"]
     nationality = entry["nationality"]
 
-    try:
-        # Step 1: Find and click location
-        location_button = find_location_button(driver, wait, location_name)
-        if not location_button:
-            print(f"Location '{location_name}' not found.")
-            return
-        driver.execute_script("arguments[0].click();", location_button)
-        print("New page URL (via JS click):", driver.current_url)
-
-        # Step 2: Click "Book Now"
-        try:
-            book_now_button = driver.find_element(By.CSS_SELECTOR, "a.btn-get-download")
-            driver.execute_script("arguments[0].click();", book_now_button)
-            print("Redirected to booking page URL:", driver.current_url)
-        except NoSuchElementException:
-            print("Book Now button not found.")
-            return
-
-        # Step 3: Select nationality
-        select_nationality(driver, nationality)
-
-        # Step 4: Select date
-        try:
-            date_element = driver.find_element(By.CSS_SELECTOR, f'td.day[data-date="{target_date}"]')
-            driver.execute_script("arguments[0].click();", date_element)
-            selected_date = driver.find_element(By.ID, "selectedDate").get_attribute("value")
-            print("Selected date:", selected_date)
-        except NoSuchElementException:
-            print(f"Date not selectable: {target_date}")
-            return
-
-        # Step 5: Add adults and students
-        plus_buttons = driver.find_elements(By.CSS_SELECTOR, "input.plus")
-        if len(plus_buttons) >= 2:
-            for _ in range(adults):
-                driver.execute_script("arguments[0].click();", plus_buttons[0])
-            for _ in range(students):
-                driver.execute_script("arguments[0].click();", plus_buttons[1])
-            print(f"Added {adults} adults and {students} students.")
-        else:
-            print("Plus buttons not found.")
-            return
+    # Step 3: Select nationality
+    select_nationality(driver, nationality)
 
-        # Step 6: Click Add to Cart & Continue
+    # Step 4: Select date
+    try:
+        date_element = driver.find_element(By.CSS_SELECTOR, f'td.day[data-date="{target_date}"]')
+        driver.execute_script("arguments[0].click();", date_element)
+        selected_date = driver.find_element(By.ID, "selectedDate").get_attribute("value")
+        print("Selected date:", selected_date)
+    except NoSuchElementException:
+        raise BookingError(f"Date not selectable: {target_date}")
+
+    # Step 5: Add adults and students
+    plus_buttons = driver.find_elements(By.CSS_SELECTOR, "input.plus")
+    if len(plus_buttons) < 2:
+        raise BookingError("Plus buttons not found")
+    for _ in range(adults):
+        driver.execute_script("arguments[0].click();", plus_buttons[0])
+    for _ in range(students):
+        driver.execute_script("arguments[0].click();", plus_buttons[1])
+    print(f"Added {adults} adults and {students} students.")
+
+    # Step 6: Click Add to Cart & Continue
+    try:
         continue_button = wait.until(EC.element_to_be_clickable((By.ID, "button1")))
-        driver.execute_script("arguments[0].click();", continue_button)
-        print("Clicked Add to cart & continue booking.")
+    except TimeoutException:
+        raise BookingError("Add to cart button not found")
+    driver.execute_script("arguments[0].click();", continue_button)
+    try:
+        # Let the cart update finish before the session navigates elsewhere
+        wait.until(EC.staleness_of(continue_button))
+    except TimeoutException:
+        pass
+    print("Clicked Add to cart & continue booking.")
 
-    except Exception as e:
-        print("Unexpected error during booking:", e)
\ No newline at end of file
+
+def book_location(driver, wait, entry, location_index=None):
+    """
+    Automate the booking process for a single entry.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        wait: WebDriverWait instance
+        entry (dict): Dictionary containing booking information with keys:
+                     'location', 'date', 'adults', 'students', 'nationality'
+        location_index: Optional LocationIndex (see location_index.py). With it the booking page
+                        is opened directly from its cached URL, from whatever page the driver is on;
+                        without it the driver must be on the locations page.
+        
+    Raises:
+        BookingError: If any booking step fails, so callers can count failures
+    """
+    if location_index is not None:
+        location_index.open_booking_page(driver, wait, entry["location"])
+    else:
+        open_booking_page(driver, wait, entry["location"])
+    fill_booking(driver, wait, entry)
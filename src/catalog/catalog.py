@@ -0,0 +1,290 @@
+"""
+Compiled attraction catalog.
+
+Builds the scraped ``museums.json``, ``monuments.json``, ``archaeological_sites.json``
+and ``sunken_monuments.json`` files once into a typed, indexed store and keeps it in a
+binary cache that is only rebuilt when one of the source files actually changes.
+"""
+
+import hashlib
+import math
+import os
+import pickle
+import sys
+import json
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_scraping", "json_files")
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.cache")
+
+# Attraction type -> source file, using the type names of the RAG notebook
+SOURCE_FILES = {
+    "museums": "museums.json",
+    "sunken_monuments": "sunken_monuments.json",
+    "monuments": "monuments.json",
+    "archaeological_sites": "archaeological_sites.json",
+}
+
+# Scraped locations that name a district or site rather than its governorate
+GOVERNORATES = {
+    "al-mu'izz street": "Cairo",
+    "cairo citadel": "Cairo",
+    "karnak": "Luxor",
+    "gebel al-silsila": "Aswan",
+    "citadel of qaitbay": "Alexandria",
+}
+
+CACHE_FORMAT_VERSION = 3
+
+FilterKey = Tuple[Optional[str], Optional[str], Optional[bool]]  # (location, type, outdoor), None = any
+
+
+def normalize(text: str) -> str:
+    """Key used by the name and location indexes."""
+    return " ".join(text.casefold().split())
+
+
+def governorate(location: str) -> str:
+    """Governorate of a scraped ``location``, e.g. ``"Karnak"`` -> ``"Luxor"``."""
+    return GOVERNORATES.get(normalize(location), location)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+@dataclass(frozen=True)
+class Attraction:
+    """A single catalog entry with coordinates and flags already coerced."""
+    id: int
+    name: str
+    url: str
+    location: str
+    type: str
+    lat: float
+    lon: float
+    outdoor: bool
+    rating: Optional[float]
+    reviews: Optional[int]
+    description: str = ""
+    opening_hours: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    prices: str = ""
+    services: List[str] = field(default_factory=list)
+
+
+class AttractionCatalog:
+    """Column store of all attractions with indexes by name, URL, location and type.
+
+    Coordinates, ratings and review counts live in ``array`` columns, flags in a
+    ``bytearray`` and locations/types are interned. Lookups go through the
+    indexes, so they cost O(result) rather than a scan of every source file.
+    """
+
+    def __init__(self, entries: List[Tuple[str, Dict[str, Any]]], signature: Dict[str, Tuple[int, int, str]]):
+        self.signature = signature
+        self.names: List[str] = []
+        self.urls: List[str] = []
+        self.locations: List[str] = []
+        self.types: List[str] = []
+        self.lat = array("d")
+        self.lon = array("d")
+        self.rating = array("d")
+        self.reviews = array("q")
+        self.outdoor = bytearray()
+        self._details: List[Tuple[str, Dict[str, Dict[str, str]], str, List[str]]] = []
+
+        for attraction_type, entry in entries:
+            self.names.append(entry.get("name", ""))
+            self.urls.append(entry.get("url", ""))
+            self.locations.append(sys.intern(entry.get("location") or ""))
+            self.types.append(sys.intern(attraction_type))
+            self.lat.append(_to_float(entry.get("Latitude")))
+            self.lon.append(_to_float(entry.get("Longitude")))
+            self.rating.append(_to_float(entry.get("rating")))
+            reviews = entry.get("reviews")
+            self.reviews.append(int(reviews) if isinstance(reviews, (int, float)) else -1)
+            self.outdoor.append(_to_bool(entry.get("Outdoors")))
+            self._details.append((
+                entry.get("description", ""),
+                entry.get("opening_hours") or {},
+                entry.get("prices", ""),
+                entry.get("services") or [],
+            ))
+
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        self._by_name: Dict[str, int] = {}
+        self._by_url: Dict[str, int] = {}
+        # Every filter combination a record matches -> ids in ascending order, so ids() is one lookup
+        self._filters: Dict[FilterKey, array] = {}
+
+        for i in range(len(self.names)):
+            self._by_name.setdefault(normalize(self.names[i]), i)
+            self._by_url.setdefault(self.urls[i], i)
+            # A site is found both by its scraped location ("Karnak") and by its governorate ("Luxor")
+            locations = {normalize(self.locations[i]), normalize(governorate(self.locations[i]))}
+            for key in self._filter_keys(locations, self.types[i], bool(self.outdoor[i])):
+                self._filters.setdefault(key, array("I")).append(i)
+
+    @staticmethod
+    def _filter_keys(locations: Set[str], type: str, outdoor: bool) -> Iterator[FilterKey]:
+        for key_location in (*sorted(locations), None):
+            for key_type in (type, None):
+                for key_outdoor in (outdoor, None):
+                    yield key_location, key_type, key_outdoor
+
+    @property
+    def version(self) -> str:
+        """Content hash of the source files; changes whenever the catalog does."""
+        digest = hashlib.sha256()
+        for name in sorted(self.signature):
+            digest.update(f"{name}:{self.signature[name][2]}".encode())
+        return digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[Attraction]:
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, i: int) -> Attraction:
+        description, opening_hours, prices, services = self._details[i]
+        rating = self.rating[i]
+        reviews = self.reviews[i]
+        return Attraction(
+            id=i,
+            name=self.names[i],
+            url=self.urls[i],
+            location=self.locations[i],
+            type=self.types[i],
+            lat=self.lat[i],
+            lon=self.lon[i],
+            outdoor=bool(self.outdoor[i]),
+            rating=None if math.isnan(rating) else rating,
+            reviews=None if reviews < 0 else reviews,
+            description=description,
+            opening_hours=opening_hours,
+            prices=prices,
+            services=services,
+        )
+
+    def by_name(self, name: str) -> Optional[Attraction]:
+        """Look up an attraction by its exact (case-insensitive) name."""
+        i = self._by_name.get(normalize(name))
+        return None if i is None else self[i]
+
+    def by_url(self, url: str) -> Optional[Attraction]:
+        """Look up an attraction by the URL it was scraped from."""
+        i = self._by_url.get(url)
+        return None if i is None else self[i]
+
+    def ids(self, location: Optional[str] = None, type: Optional[str] = None,
+            outdoor: Optional[bool] = None) -> List[int]:
+        """Ids of the attractions matching every filter that is not ``None``, in ascending order.
+
+        ``location`` is a governorate, which covers the sites scraped under one of its
+        districts (``"Luxor"`` includes ``"Karnak"``), or a scraped location.
+        """
+        key = (normalize(location) if location is not None else None, type,
+               bool(outdoor) if outdoor is not None else None)
+        return list(self._filters.get(key, ()))
+
+    def find(self, location: Optional[str] = None, type: Optional[str] = None,
+             outdoor: Optional[bool] = None) -> List[Attraction]:
+        """Attractions matching the filters, e.g. ``find(location="Luxor", outdoor=True)``."""
+        return [self[i] for i in self.ids(location, type, outdoor)]
+
+    def location_names(self) -> List[str]:
+        """Distinct governorates/locations in the catalog."""
+        return sorted(set(self.locations))
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _source_signature(data_dir: str, previous: Dict[str, Tuple[int, int, str]]) -> Dict[str, Tuple[int, int, str]]:
+    """Return ``{file: (size, mtime_ns, sha256)}``, hashing only files whose size or mtime moved."""
+    signature = {}
+    for file_name in SOURCE_FILES.values():
+        stat = os.stat(os.path.join(data_dir, file_name))
+        old = previous.get(file_name)
+        if old and old[0] == stat.st_size and old[1] == stat.st_mtime_ns:
+            signature[file_name] = old
+        else:
+            signature[file_name] = (stat.st_size, stat.st_mtime_ns, _file_hash(os.path.join(data_dir, file_name)))
+    return signature
+
+
+def build_catalog(data_dir: str = DATA_DIR,
+                  signature: Optional[Dict[str, Tuple[int, int, str]]] = None) -> AttractionCatalog:
+    """Build the catalog straight from the scraped JSON files."""
+    entries = []
+    for attraction_type, file_name in SOURCE_FILES.items():
+        with open(os.path.join(data_dir, file_name), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [data]
+        entries.extend((attraction_type, entry) for entry in data)
+    return AttractionCatalog(entries, signature or _source_signature(data_dir, {}))
+
+
+def _read_cache(cache_file: str) -> Optional[AttractionCatalog]:
+    if not cache_file or not os.path.exists(cache_file):
+        return None
+    try:
+        with open(cache_file, "rb") as f:
+            version, state = pickle.load(f)
+    except (pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+        print(f"Warning: Ignoring unreadable catalog cache {cache_file}: {e}")
+        return None
+    if version != CACHE_FORMAT_VERSION:
+        return None
+    # The cache holds only builtin containers, so it does not depend on this module's import path
+    catalog = AttractionCatalog.__new__(AttractionCatalog)
+    catalog.__dict__.update(state)
+    return catalog
+
+
+def _write_cache(cache_file: str, catalog: AttractionCatalog) -> None:
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, "wb") as f:
+        pickle.dump((CACHE_FORMAT_VERSION, catalog.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, cache_file)
+
+
+def load_catalog(data_dir: str = DATA_DIR, cache_file: Optional[str] = CACHE_FILE) -> AttractionCatalog:
+    """Load the catalog from its binary cache, rebuilding it if a source file changed.
+
+    A source whose mtime moved but whose content hash is unchanged does not
+    trigger a rebuild; the cache is just re-stamped with the new mtime.
+    """
+    cached = _read_cache(cache_file)
+    signature = _source_signature(data_dir, cached.signature if cached else {})
+
+    if cached is not None and signature == cached.signature:
+        return cached
+
+    hashes = {name: entry[2] for name, entry in signature.items()}
+    if cached is not None and hashes == {name: entry[2] for name, entry in cached.signature.items()}:
+        catalog = cached
+        catalog.signature = signature
+    else:
+        catalog = build_catalog(data_dir, signature)
+
+    if cache_file:
+        _write_cache(cache_file, catalog)
+    return catalog
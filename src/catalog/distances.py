@@ -0,0 +1,188 @@
+"""
+Pairwise distances and travel times between catalog attractions.
+
+Great-circle distances are computed for every site pair in one vectorized NumPy
+pass and turned into travel minutes with a road-speed model (an average speed
+per governorate, an intercity speed and a detour factor). Both site x site
+matrices are stored as ``.npy`` files next to ``catalog.py`` and opened
+memory-mapped, so a planner looks up a pair in O(1) without recomputing
+anything. They are rebuilt only when ``catalog.version`` or the speed model
+changes.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from catalog import AttractionCatalog, governorate, load_catalog, normalize
+
+CACHE_DIR = os.path.dirname(os.path.abspath(__file__))
+EARTH_RADIUS_KM = 6371.0
+
+# Average door-to-door speeds for trips inside a governorate (city traffic vs. open roads)
+ROAD_SPEEDS_KMH = {
+    "Cairo": 20.0,
+    "Giza": 25.0,
+    "Alexandria": 25.0,
+    "Luxor": 30.0,
+    "Aswan": 30.0,
+}
+
+CACHE_FORMAT_VERSION = 1
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km; the arguments broadcast against each other."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def haversine_matrix(lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+    """(n x n) great-circle distances in km between n points."""
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+@dataclass(frozen=True)
+class TravelModel:
+    """Road-speed model turning straight-line km into travel minutes.
+
+    A trip inside one governorate uses that governorate's speed from
+    ``governorate_speeds`` (or ``speed_kmh``), a trip between governorates uses
+    ``intercity_kmh``. ``detour`` scales the straight-line distance to road km.
+    The default is a uniform 30 km/h with no detour.
+    """
+    speed_kmh: float = 30.0
+    intercity_kmh: float = 30.0
+    detour: float = 1.0
+    governorate_speeds: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def roads(cls) -> "TravelModel":
+        """Per-governorate city speeds from ``ROAD_SPEEDS_KMH``, 70 km/h between governorates."""
+        return cls(speed_kmh=35.0, intercity_kmh=70.0, detour=1.3, governorate_speeds=dict(ROAD_SPEEDS_KMH))
+
+    @property
+    def key(self) -> str:
+        """Hash of the model's parameters, part of the cache key."""
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()
+
+    def minutes(self, distances_km: np.ndarray, origins: Sequence[str], destinations: Sequence[str]) -> np.ndarray:
+        """Travel minutes for a (origins x destinations) block of distances, given each site's governorate."""
+        origins, destinations = np.asarray(origins, dtype=object), np.asarray(destinations, dtype=object)
+        local = np.array([self.governorate_speeds.get(g, self.speed_kmh) for g in origins], dtype=float)
+        speeds = np.where(origins[:, None] == destinations[None, :], local[:, None], self.intercity_kmh)
+        return distances_km * self.detour / speeds * 60.0
+
+
+class TravelMatrix:
+    """Memory-mapped site x site distance (km) and travel time (minutes) matrices.
+
+    Rows and columns are catalog ids. ``minutes(i, j)`` and ``km(i, j)`` accept
+    ids or id arrays; ``minutes_between`` and ``submatrix`` go through
+    attraction names.
+    """
+
+    def __init__(self, catalog: AttractionCatalog, distances_km: np.ndarray, minutes: np.ndarray,
+                 model: TravelModel):
+        self.catalog = catalog
+        self.model = model
+        self.distances_km = distances_km
+        self.travel_minutes = minutes
+        self._ids = {normalize(name): i for i, name in reversed(list(enumerate(catalog.names)))}
+
+    def __len__(self) -> int:
+        return self.distances_km.shape[0]
+
+    def id(self, name: str) -> Optional[int]:
+        """Catalog id of an attraction name, or ``None`` if it is not in the catalog."""
+        return self._ids.get(normalize(name))
+
+    def km(self, i, j) -> np.ndarray:
+        return self.distances_km[i, j]
+
+    def minutes(self, i, j) -> np.ndarray:
+        return self.travel_minutes[i, j]
+
+    def minutes_between(self, a: str, b: str) -> Optional[float]:
+        """Travel minutes between two attractions by name, ``None`` if either is unknown."""
+        i, j = self.id(a), self.id(b)
+        if i is None or j is None:
+            return None
+        return float(self.travel_minutes[i, j])
+
+    def submatrix(self, names: Iterable[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(km, minutes) among the named attractions, or ``None`` if any name is unknown."""
+        ids = [self.id(name) for name in names]
+        if any(i is None for i in ids):
+            return None
+        rows = np.ix_(ids, ids)
+        return np.asarray(self.distances_km[rows]), np.asarray(self.travel_minutes[rows])
+
+
+def _cache_paths(cache_dir: str) -> Dict[str, str]:
+    return {
+        "meta": os.path.join(cache_dir, "distances.json"),
+        "km": os.path.join(cache_dir, "distances_km.npy"),
+        "minutes": os.path.join(cache_dir, "travel_minutes.npy"),
+    }
+
+
+def _cache_key(catalog: AttractionCatalog, model: TravelModel) -> Dict[str, object]:
+    return {"format": CACHE_FORMAT_VERSION, "catalog": catalog.version, "model": model.key, "sites": len(catalog)}
+
+
+def build_matrices(catalog: AttractionCatalog, model: TravelModel, cache_dir: str,
+                   block_rows: int = 1024) -> None:
+    """Write both matrices to ``cache_dir``, a block of rows at a time."""
+    paths = _cache_paths(cache_dir)
+    if os.path.exists(paths["meta"]):
+        os.remove(paths["meta"])
+
+    lat = np.frombuffer(catalog.lat, dtype=float)
+    lon = np.frombuffer(catalog.lon, dtype=float)
+    governorates = np.array([governorate(location) for location in catalog.locations], dtype=object)
+    n = len(catalog)
+
+    tmp = {name: f"{paths[name]}.tmp.npy" for name in ("km", "minutes")}
+    km_out = np.lib.format.open_memmap(tmp["km"], mode="w+", dtype=np.float32, shape=(n, n))
+    minutes_out = np.lib.format.open_memmap(tmp["minutes"], mode="w+", dtype=np.float32, shape=(n, n))
+    for start in range(0, n, block_rows):
+        rows = slice(start, min(start + block_rows, n))
+        km = haversine_km(lat[rows, None], lon[rows, None], lat[None, :], lon[None, :])
+        km_out[rows] = km
+        minutes_out[rows] = model.minutes(km, governorates[rows], governorates)
+    km_out.flush()
+    minutes_out.flush()
+    del km_out, minutes_out
+
+    for name in ("km", "minutes"):
+        os.replace(tmp[name], paths[name])
+    with open(f"{paths['meta']}.tmp", "w", encoding="utf-8") as f:
+        json.dump(_cache_key(catalog, model), f)
+    os.replace(f"{paths['meta']}.tmp", paths["meta"])
+
+
+def load_travel_matrix(catalog: Optional[AttractionCatalog] = None, model: Optional[TravelModel] = None,
+                       cache_dir: str = CACHE_DIR) -> TravelMatrix:
+    """Open the cached matrices memory-mapped, rebuilding them if the catalog or model changed."""
+    catalog = catalog if catalog is not None else load_catalog()
+    model = model or TravelModel()
+    paths = _cache_paths(cache_dir)
+
+    try:
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = None
+    if cached != _cache_key(catalog, model):
+        build_matrices(catalog, model, cache_dir)
+
+    distances_km = np.load(paths["km"], mmap_mode="r")
+    minutes = np.load(paths["minutes"], mmap_mode="r")
+    return TravelMatrix(catalog, distances_km, minutes, model)
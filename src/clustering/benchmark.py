@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Day clustering benchmarks.
+
+Compares the Optuna-tuned KMeans search of ClusteringLocations.ipynb with the
+capacitated clustering in capacitated.py on the notebook's sample sites: run
+time, day totals against the per-day budget and how spread out each day is.
+A scaling mode times the capacitated clustering on random sets of 40-500 sites,
+and a fuzz mode checks that it places every instance first-fit decreasing can pack.
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from capacitated import capacitated_clusters, day_spread_km
+
+# The sample input of ClusteringLocations.ipynb: (name, lon, lat, outdoor, hours_needed)
+SAMPLE_SITES = [
+    ("Site A", 2.3522, 48.8566, True, 3),
+    ("Site B", 2.3488, 48.8530, False, 2),
+    ("Site C", 2.3376, 48.8606, True, 4),
+    ("Site D", 2.2950, 48.8738, False, 3),
+    ("Site E", 2.3708, 48.8450, True, 2),
+    ("Site F", 2.2840, 48.8607, False, 3),
+    ("Site G", 2.3310, 48.8685, True, 3),
+    ("Site H", 2.3520, 48.8500, True, 2),
+    ("Site I", 2.3150, 48.8550, False, 4),
+    ("Site J", 2.3580, 48.8620, True, 2),
+    ("Site K", 2.3421, 48.8473, True, 5),
+    ("Site L", 2.3275, 48.8512, False, 1),
+    ("Site M", 2.3667, 48.8578, True, 4),
+    ("Site N", 2.3019, 48.8495, False, 2),
+    ("Site O", 2.3544, 48.8639, True, 3),
+    ("Site P", 2.2891, 48.8542, True, 3),
+    ("Site Q", 2.3723, 48.8486, False, 4),
+    ("Site R", 2.3358, 48.8591, True, 2),
+    ("Site S", 2.3217, 48.8644, False, 1),
+    ("Site T", 2.3476, 48.8667, True, 5),
+    ("Site U", 2.3033, 48.8583, True, 3),
+    ("Site V", 2.3642, 48.8521, False, 2),
+    ("Site W", 2.3389, 48.8458, True, 4),
+    ("Site X", 2.3125, 48.8672, True, 3),
+    ("Site Y", 2.3567, 48.8494, False, 2),
+    ("Site Z", 2.3248, 48.8536, True, 5),
+    ("Site AA", 2.2987, 48.8625, False, 1),
+    ("Site AB", 2.3678, 48.8556, True, 3),
+    ("Site AC", 2.3415, 48.8689, True, 4),
+    ("Site AD", 2.3192, 48.8517, False, 2),
+    ("Site AE", 2.3529, 48.8472, True, 3),
+    ("Site AF", 2.3324, 48.8643, False, 5),
+    ("Site AG", 2.3066, 48.8564, True, 2),
+    ("Site AH", 2.3583, 48.8597, True, 4),
+    ("Site AI", 2.3451, 48.8548, False, 1),
+    ("Site AJ", 2.3279, 48.8573, True, 3),
+    ("Site AK", 2.3741, 48.8465, True, 5),
+    ("Site AL", 2.3025, 48.8658, False, 2),
+    ("Site AM", 2.3367, 48.8519, True, 4),
+    ("Site AN", 2.3555, 48.8612, True, 3),
+]
+
+SAMPLE_DAYS = 10
+SAMPLE_MAX_HOURS = 24
+
+
+def optuna_kmeans(lat: np.ndarray, lon: np.ndarray, hours: np.ndarray, n_days: int, max_hours: float,
+                  n_trials: int = 50) -> np.ndarray:
+    """The notebook's search: KMeans on lon/lat plus a weighted hours column, weight tuned by Optuna."""
+    import optuna
+    import pandas as pd
+    from sklearn.cluster import KMeans
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    df = pd.DataFrame({"lon": lon, "lat": lat, "hours_needed": hours})
+    df["hours_norm"] = df["hours_needed"] / df["hours_needed"].max()
+
+    def objective(trial):
+        weight_hours = trial.suggest_float("weight_hours", 0.0, 1.0)
+        kmeans = KMeans(n_clusters=n_days, random_state=42)
+        X_weighted = np.hstack([df[["lon", "lat"]].values, df[["hours_norm"]].values * weight_hours])
+        df["cluster"] = kmeans.fit_predict(X_weighted)
+
+        penalty = 0
+        for i in range(n_days):
+            day_hours = df[df["cluster"] == i]["hours_needed"].sum()
+            penalty += abs(day_hours - max_hours)
+            if day_hours > max_hours:
+                penalty += (day_hours - max_hours) * 10
+        day_totals = [df[df["cluster"] == i]["hours_needed"].sum() for i in range(n_days)]
+        penalty += np.std(day_totals) * 5
+        return penalty
+
+    study = optuna.create_study(direction="minimize")
+    study.optimize(objective, n_trials=n_trials)
+
+    X_weighted = np.hstack([df[["lon", "lat"]].values, df[["hours_norm"]].values * study.best_params["weight_hours"]])
+    return KMeans(n_clusters=n_days, random_state=42).fit_predict(X_weighted)
+
+
+def evaluate(run: Callable[[], np.ndarray], lat: np.ndarray, lon: np.ndarray, hours: np.ndarray, n_days: int,
+             max_hours: float) -> Dict[str, Any]:
+    """Time one clustering and describe its days."""
+    start = time.perf_counter()
+    labels = run()
+    seconds = time.perf_counter() - start
+    totals = np.bincount(labels, weights=hours, minlength=n_days)
+    return {
+        "seconds": seconds,
+        "min_hours": totals.min(),
+        "max_hours": totals.max(),
+        "std_hours": totals.std(),
+        "over_budget": int((totals > max_hours).sum()),
+        "spread_km": float(np.mean(day_spread_km(lat, lon, labels))),
+    }
+
+
+def sample_arrays() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    lon = np.array([site[1] for site in SAMPLE_SITES])
+    lat = np.array([site[2] for site in SAMPLE_SITES])
+    hours = np.array([site[4] for site in SAMPLE_SITES], dtype=float)
+    return lat, lon, hours
+
+
+def benchmark_sample(args) -> None:
+    lat, lon, hours = sample_arrays()
+    n_days, max_hours = args.days, args.max_hours
+    results = {
+        "capacitated": evaluate(lambda: capacitated_clusters(lat, lon, hours, n_days, max_hours).labels,
+                                lat, lon, hours, n_days, max_hours),
+        "capacitated x4": evaluate(lambda: capacitated_clusters(lat, lon, hours, n_days, max_hours, n_init=4).labels,
+                                   lat, lon, hours, n_days, max_hours),
+    }
+    try:
+        results[f"optuna ({args.trials} trials)"] = evaluate(
+            lambda: optuna_kmeans(lat, lon, hours, n_days, max_hours, args.trials), lat, lon, hours, n_days, max_hours)
+    except ImportError as e:
+        print(f"Warning: Skipping the Optuna baseline ({e})")
+
+    print(f"\n{len(lat)} sample sites, {n_days} days of at most {max_hours}h:")
+    print("=" * 60)
+    for name, result in results.items():
+        print(f"  {name:<22} {result['seconds'] * 1000:9.1f} ms  day hours {result['min_hours']:4.0f}-"
+              f"{result['max_hours']:<4.0f} (std {result['std_hours']:4.1f})  over budget: {result['over_budget']}  "
+              f"spread {result['spread_km']:.2f} km")
+
+
+def random_sites(n_sites: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sites scattered over a city-sized area (about 100 km across) with 1-5 hour visits."""
+    lat = 30.05 + rng.normal(0, 0.25, n_sites)
+    lon = 31.25 + rng.normal(0, 0.25, n_sites)
+    return lat, lon, rng.integers(1, 6, n_sites).astype(float)
+
+
+def benchmark_scaling(args) -> None:
+    rng = np.random.default_rng(args.seed)
+    print(f"\nCapacitated clustering, days of at most {args.max_hours}h:")
+    print("=" * 60)
+    for n_sites in args.sites:
+        lat, lon, hours = random_sites(n_sites, rng)
+        n_days = int(np.ceil(hours.sum() / (args.max_hours * 0.9)))
+        result = evaluate(lambda: capacitated_clusters(lat, lon, hours, n_days, args.max_hours).labels,
+                          lat, lon, hours, n_days, args.max_hours)
+        print(f"  {n_sites:4d} sites {n_days:3d} days  {result['seconds'] * 1000:8.1f} ms  day hours "
+              f"{result['min_hours']:4.0f}-{result['max_hours']:<4.0f}  over budget: {result['over_budget']}")
+
+
+def first_fit_decreasing(hours: np.ndarray, n_days: int, max_hours: float) -> Optional[np.ndarray]:
+    """Reference packing check: biggest sites first, each on the first day with room; None if one fits nowhere."""
+    loads = np.zeros(n_days)
+    labels = np.full(len(hours), -1)
+    for i in np.argsort(-hours, kind="stable"):
+        room = np.flatnonzero(loads + hours[i] <= max_hours)
+        if room.size == 0:
+            return None
+        labels[i] = room[0]
+        loads[room[0]] += hours[i]
+    return labels
+
+
+def fuzz(args) -> None:
+    """Random tight instances: wherever first-fit decreasing packs the sites, the clustering must too."""
+    rng = np.random.default_rng(args.seed)
+    packable = failures = 0
+    for trial in range(args.trials):
+        n_sites, max_hours = int(rng.integers(5, 60)), float(rng.integers(4, 13))
+        hours = rng.integers(1, int(max_hours) + 1, n_sites).astype(float)
+        n_days = int(np.ceil(hours.sum() / max_hours)) + int(rng.integers(0, 4))
+        lat, lon = 22 + 9 * rng.random(n_sites), 25 + 9 * rng.random(n_sites)
+        if first_fit_decreasing(hours, n_days, max_hours) is None:
+            continue
+        packable += 1
+        try:
+            result = capacitated_clusters(lat, lon, hours, n_days, max_hours, seed=trial)
+        except ValueError as e:
+            failures += 1
+            print(f"  trial {trial}: {e}")
+            continue
+        assert len(result.labels) == n_sites and (result.day_hours <= max_hours + 1e-9).all(), trial
+        assert np.isclose(result.day_hours.sum(), hours.sum()), trial
+    print(f"\n{packable} of {args.trials} random instances packable by first-fit decreasing, "
+          f"{failures} not placed by capacitated_clusters")
+    if failures:
+        raise SystemExit(1)
+
+
+def main():
+    """Main entry point with argument parsing."""
+    parser = argparse.ArgumentParser(description="Benchmarks for day clustering")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    sample = subparsers.add_parser("sample", help="Compare the Optuna KMeans search with capacitated clustering")
+    sample.add_argument("--days", type=int, default=SAMPLE_DAYS, help="Number of days")
+    sample.add_argument("--max-hours", type=float, default=SAMPLE_MAX_HOURS, help="Hour budget per day")
+    sample.add_argument("--trials", type=int, default=50, help="Optuna trials, as in the notebook")
+    sample.set_defaults(func=benchmark_sample)
+
+    scaling = subparsers.add_parser("scaling", help="Time capacitated clustering on random sites")
+    scaling.add_argument("--sites", type=int, nargs="+", default=[40, 100, 200, 500], help="Site counts")
+    scaling.add_argument("--max-hours", type=float, default=10, help="Hour budget per day")
+    scaling.add_argument("--seed", type=int, default=0, help="Random seed for the sites")
+    scaling.set_defaults(func=benchmark_scaling)
+
+    fuzz_parser = subparsers.add_parser("fuzz", help="Check feasibility against first-fit decreasing")
+    fuzz_parser.add_argument("--trials", type=int, default=500, help="Random instances")
+    fuzz_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    fuzz_parser.set_defaults(func=fuzz)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Capacity-constrained geographic clustering of sites into days.
+
+Each day is a cluster with a hard budget of ``max_hours`` of visits, and the day
+totals are kept within ``balance`` of the average day. The clustering runs Lloyd
+iterations on great-circle (haversine) distances. The assignment step is a
+min-cost flow: every site supplies its ``hours_needed`` and every day takes
+between the lower and upper balance bound, with the distance to the day's
+center as the cost per hour. This transportation problem is solved exactly by
+successive shortest paths on the small graph of days (plus a sink for the slack
+between the bounds), in plain NumPy. Its optimal solution splits at most a
+handful of sites between days; those are placed whole on the day that got most
+of their hours and still has room (making room with one move, or packing all
+sites again if that fails), and single-site moves then restore the balance
+bounds where possible. No day ever exceeds ``max_hours``. The result is
+deterministic for a given ``seed``.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+FLOW_EPS = 1e-9
+
+
+def haversine_matrix(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km between every point of the first set and every point of the second."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    dlat = lat2[None, :] - lat1[:, None]
+    dlon = lon2[None, :] - lon1[:, None]
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat1)[:, None] * np.cos(lat2)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def spherical_mean(lat: np.ndarray, lon: np.ndarray) -> Tuple[float, float]:
+    """Center of a set of points on the sphere (mean of their unit vectors)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    x, y, z = (np.cos(lat) * np.cos(lon)).mean(), (np.cos(lat) * np.sin(lon)).mean(), np.sin(lat).mean()
+    return float(np.degrees(np.arctan2(z, np.hypot(x, y)))), float(np.degrees(np.arctan2(y, x)))
+
+
+@dataclass
+class DayClusters:
+    labels: np.ndarray  # day index of every site
+    centers: np.ndarray  # (n_days, 2) latitude, longitude of each day's center
+    day_hours: np.ndarray  # total hours_needed of each day
+    cost: float  # sum of hours_needed * km from each site to its day's center
+    iterations: int  # Lloyd iterations of the returned run
+
+
+def day_edges(flow: np.ndarray, distances: np.ndarray, day: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cheapest way to move flow out of ``day`` into every other day: the added distance
+    per hour and the site that would move, for each target day.
+    """
+    n_days = distances.shape[1]
+    sites = np.flatnonzero(flow[:, day] > FLOW_EPS)
+    if sites.size == 0:
+        return np.full(n_days, np.inf), np.full(n_days, -1)
+    moves = distances[sites] - distances[sites, day][:, None]
+    best = moves.argmin(axis=0)
+    cost = moves[best, np.arange(n_days)]
+    cost[day] = np.inf
+    return cost, sites[best]
+
+
+def all_day_edges(labels: np.ndarray, distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """day_edges for every day at once, when every site is whole on the day in labels."""
+    n_sites, n_days = distances.shape
+    order = np.argsort(labels, kind="stable")
+    days, starts = np.unique(labels[order], return_index=True)
+    moves = distances[order] - distances[order, labels[order]][:, None]
+    cost = np.full((n_days, n_days), np.inf)
+    cost[days] = np.minimum.reduceat(moves, starts, axis=0)
+    # The first site of each day reaching the minimum, found as the smallest position with that move
+    positions = np.where(moves == np.repeat(cost[days], np.diff(np.append(starts, n_sites)), axis=0),
+                         np.arange(n_sites)[:, None], n_sites)
+    via = np.full((n_days, n_days), -1)
+    via[days] = order[np.minimum.reduceat(positions, starts, axis=0)]
+    cost[np.arange(n_days), np.arange(n_days)] = np.inf
+    return cost, via
+
+
+def shortest_paths(edges: np.ndarray, sources: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Bellman-Ford over the day graph from all source days at once: distances and parent days.
+
+    Each round only relaxes the edges out of days whose distance just improved.
+    """
+    n_days = len(edges)
+    dist = np.full(n_days, np.inf)
+    dist[sources] = 0.0
+    parent = np.full(n_days, -1)
+    columns = np.arange(n_days)
+    active = np.asarray(sources)
+    for _ in range(n_days):
+        candidate = dist[active, None] + edges[active]
+        best = candidate.argmin(axis=0)
+        new = candidate[best, columns]
+        improved = new < dist - 1e-12
+        active_next = improved.nonzero()[0]
+        if active_next.size == 0:
+            break
+        dist[active_next] = new[active_next]
+        parent[active_next] = active[best[active_next]]
+        active = active_next
+    return dist, parent
+
+
+def min_cost_flow(distances: np.ndarray, hours: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """
+    Hours of each site sent to each day (n_sites x n_days) minimizing hours-weighted
+    distance with every day total in [lower, upper].
+
+    Sites send their hours to days and days pass them on to a sink T, between
+    lower and upper each. The solver starts from every site on its nearest day,
+    which is optimal without the bounds, and runs successive shortest paths from
+    days (and T) with too many hours to those with too few. A residual edge
+    a -> b between days moves hours of the site on a that is cheapest to put on
+    b instead; edges to and from T adjust how much a day passes on.
+    """
+    n_sites, n_days = distances.shape
+    sink = n_days
+    flow = np.zeros((n_sites, n_days))
+    flow[np.arange(n_sites), distances.argmin(axis=1)] = hours
+    loads = flow.sum(axis=0)
+    to_sink = np.clip(loads, lower, upper)  # hours each day passes on to T
+
+    edges = np.full((n_days + 1, n_days + 1), np.inf)
+    edges[:n_days, :n_days], via = all_day_edges(distances.argmin(axis=1), distances)
+
+    for _ in range(4 * (n_sites + n_days)):
+        excess = np.append(loads - to_sink, to_sink.sum() - hours.sum())
+        if (np.abs(excess) <= FLOW_EPS * len(excess)).all():
+            break
+        edges[:n_days, sink] = np.where(to_sink < upper - FLOW_EPS, 0.0, np.inf)
+        edges[sink, :n_days] = np.where(to_sink > lower + FLOW_EPS, 0.0, np.inf)
+        dist, parent = shortest_paths(edges, np.flatnonzero(excess > FLOW_EPS))
+        targets = np.flatnonzero((excess < -FLOW_EPS) & np.isfinite(dist))
+        if targets.size == 0:
+            raise ValueError("Capacity assignment failed: no flow meets the day bounds")
+
+        # Every shortest path is admissible for the same distances, so paths that share no day (or T) are
+        # augmented together, nearest target first, before the distances are computed again
+        used = np.zeros(n_days + 1, dtype=bool)
+        changed = set()
+        for target in targets[np.argsort(dist[targets], kind="stable")]:
+            path = [target]
+            while parent[path[-1]] >= 0 and len(path) <= n_days + 1:
+                path.append(parent[path[-1]])
+            if used[path].any():
+                continue
+            used[path] = True
+            path.reverse()
+            hops = list(zip(path[:-1], path[1:]))
+            capacity = [excess[path[0]], -excess[target]]
+            for a, b in hops:
+                if a == sink:
+                    capacity.append(to_sink[b] - lower)
+                elif b == sink:
+                    capacity.append(upper - to_sink[a])
+                else:
+                    capacity.append(flow[via[a, b], a])
+            amount = min(capacity)
+
+            for a, b in hops:
+                if a == sink:
+                    to_sink[b] -= amount
+                elif b == sink:
+                    to_sink[a] += amount
+                else:
+                    site = via[a, b]
+                    flow[site, a] -= amount
+                    flow[site, b] += amount
+                    if flow[site, a] < FLOW_EPS:
+                        flow[site, a] = 0.0
+                    loads[a] -= amount
+                    loads[b] += amount
+            changed.update(path)
+        for day in changed - {sink}:
+            edges[day, :n_days], via[day] = day_edges(flow, distances, day)
+    return flow
+
+
+def assign_with_capacity(distances: np.ndarray, hours: np.ndarray, lower: float, upper: float,
+                         max_hours: float) -> np.ndarray:
+    """
+    Assign every site to one day, minimizing hours-weighted distance.
+
+    Solves the min-cost flow with day totals in [lower, upper], then places each
+    site the flow split between days on the day with the largest share of it
+    that stays within max_hours. A site that fits on no day gets room by moving
+    one site off a day; if that fails too, all sites are packed again (see
+    pack_sites) and improved by single moves.
+    """
+    flow = min_cost_flow(distances, hours, lower, upper)
+    n_days = distances.shape[1]
+    labels = flow.argmax(axis=1)
+    split = flow.max(axis=1) < hours - 1e-6
+    loads = np.bincount(labels[~split], weights=hours[~split], minlength=n_days)
+
+    # Biggest split sites first: the day holding most of the site, then the closest one, within upper if possible
+    for i in sorted(np.flatnonzero(split), key=lambda i: -hours[i]):
+        preference = np.lexsort((distances[i], -flow[i]))
+        fits = np.concatenate([preference[loads[preference] + hours[i] <= limit + FLOW_EPS]
+                               for limit in (upper, max_hours)])
+        if fits.size:
+            labels[i] = fits[0]
+            loads[fits[0]] += hours[i]
+        elif not make_room(i, labels, split, loads, distances, hours, max_hours):
+            labels = improve(pack_sites(distances, hours, max_hours), distances, hours, max_hours)
+            break
+        split[i] = False
+    return rebalance(labels, distances, hours, lower, upper)
+
+
+def make_room(site: int, labels: np.ndarray, unplaced: np.ndarray, loads: np.ndarray, distances: np.ndarray,
+              hours: np.ndarray, max_hours: float) -> bool:
+    """
+    Place site on a full day by moving one placed site from that day to another day with room, cheapest first.
+    Returns False, changing nothing, if no single move makes room.
+    """
+    best = None
+    for day in range(len(loads)):
+        for other in np.flatnonzero((labels == day) & ~unplaced):
+            if loads[day] - hours[other] + hours[site] > max_hours + FLOW_EPS:
+                continue
+            room = loads + hours[other] <= max_hours + FLOW_EPS
+            room[day] = False
+            if not room.any():
+                continue
+            target = np.flatnonzero(room)[distances[other, room].argmin()]
+            added = (hours[site] * distances[site, day]
+                     + hours[other] * (distances[other, target] - distances[other, day]))
+            if best is None or added < best[0]:
+                best = (added, day, other, target)
+    if best is None:
+        return False
+    _, day, other, target = best
+    labels[other] = target
+    loads[day] += hours[site] - hours[other]
+    loads[target] += hours[other]
+    labels[site] = day
+    return True
+
+
+def pack_decreasing(hours: np.ndarray, n_days: int, max_hours: float, choose) -> Optional[np.ndarray]:
+    """Biggest sites first, each on the day choose(site, days with room) picks; None if a site fits nowhere."""
+    labels = np.full(len(hours), -1)
+    loads = np.zeros(n_days)
+    for i in np.argsort(-hours, kind="stable"):
+        room = np.flatnonzero(loads + hours[i] <= max_hours + FLOW_EPS)
+        if room.size == 0:
+            return None
+        day = choose(i, room, loads)
+        labels[i] = day
+        loads[day] += hours[i]
+    return labels
+
+
+def pack_sites(distances: np.ndarray, hours: np.ndarray, max_hours: float) -> np.ndarray:
+    """
+    Whole-site assignment within max_hours when the flow's split sites cannot all be placed.
+
+    Tries, biggest sites first, the closest day with room, then best fit (the
+    fullest day with room) and first-fit decreasing; the packed days of the
+    last two are matched to the days' centers, cheapest first. Raises only if
+    first-fit decreasing fails as well.
+    """
+    n_sites, n_days = distances.shape
+    labels = pack_decreasing(hours, n_days, max_hours, lambda i, room, loads: room[distances[i, room].argmin()])
+    if labels is not None:
+        return labels
+    for choose in (lambda i, room, loads: room[loads[room].argmax()], lambda i, room, loads: room[0]):
+        packed = pack_decreasing(hours, n_days, max_hours, choose)
+        if packed is None:
+            continue
+        # cost[b, d]: hours-weighted distance of putting packed day b on day d; pair them greedily
+        cost = np.zeros((n_days, n_days))
+        np.add.at(cost, packed, hours[:, None] * distances)
+        day_of = np.full(n_days, -1)
+        taken = np.zeros(n_days, dtype=bool)
+        for flat in np.argsort(cost, axis=None, kind="stable"):
+            b, d = divmod(int(flat), n_days)
+            if day_of[b] < 0 and not taken[d]:
+                day_of[b], taken[d] = d, True
+        return day_of[packed]
+    raise ValueError(f"❌ Infeasible: the sites cannot be packed into {n_days} days of {max_hours}h "
+                     f"(first-fit decreasing fails as well)")
+
+
+def improve(labels: np.ndarray, distances: np.ndarray, hours: np.ndarray, max_hours: float) -> np.ndarray:
+    """Move single sites, biggest saving first, to closer days with room until no move saves distance."""
+    n_sites, n_days = distances.shape
+    sites = np.arange(n_sites)
+    loads = np.bincount(labels, weights=hours, minlength=n_days)
+    for _ in range(n_sites * n_days):
+        saving = np.where(loads[None, :] + hours[:, None] <= max_hours + FLOW_EPS,
+                          hours[:, None] * (distances[sites, labels][:, None] - distances), 0.0)
+        i, day = np.unravel_index(saving.argmax(), saving.shape)
+        if saving[i, day] <= 1e-9:
+            break
+        loads[labels[i]] -= hours[i]
+        loads[day] += hours[i]
+        labels[i] = day
+    return labels
+
+
+def rebalance(labels: np.ndarray, distances: np.ndarray, hours: np.ndarray, lower: float,
+              upper: float) -> np.ndarray:
+    """
+    Move single sites, cheapest first, out of days above upper or into days below
+    lower, as long as no other day leaves [lower, upper].
+    """
+    n_sites, n_days = distances.shape
+    sites = np.arange(n_sites)
+    loads = np.bincount(labels, weights=hours, minlength=n_days)
+    for _ in range(n_sites):
+        over = loads > upper + FLOW_EPS
+        under = loads < lower - FLOW_EPS
+        if not (over.any() or under.any()):
+            break
+        allowed = ((over[labels][:, None] | under[None, :])
+                   & (loads[None, :] + hours[:, None] <= upper + FLOW_EPS)
+                   & (loads[labels] - hours >= lower - FLOW_EPS)[:, None])
+        allowed[sites, labels] = False
+        if not allowed.any():
+            break
+        added = np.where(allowed, hours[:, None] * (distances - distances[sites, labels][:, None]), np.inf)
+        i, day = np.unravel_index(added.argmin(), added.shape)
+        loads[labels[i]] -= hours[i]
+        loads[day] += hours[i]
+        labels[i] = day
+    return labels
+
+
+def initial_centers(lat: np.ndarray, lon: np.ndarray, n_days: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding on haversine distances."""
+    n_sites = len(lat)
+    first = rng.integers(n_sites)
+    chosen = [first]
+    closest = haversine_matrix(lat[[first]], lon[[first]], lat, lon)[0] ** 2
+    for _ in range(1, min(n_days, n_sites)):
+        total = closest.sum()
+        nxt = rng.choice(n_sites, p=closest / total) if total > 0 else rng.integers(n_sites)
+        chosen.append(nxt)
+        closest = np.minimum(closest, haversine_matrix(lat[[nxt]], lon[[nxt]], lat, lon)[0] ** 2)
+    # More days than sites: the extra days start on already chosen sites
+    chosen += [chosen[d % len(chosen)] for d in range(len(chosen), n_days)]
+    return np.column_stack([lat[chosen], lon[chosen]])
+
+
+def update_centers(lat: np.ndarray, lon: np.ndarray, labels: np.ndarray, centers: np.ndarray) -> None:
+    """Move every non-empty day's center to the spherical mean of its sites."""
+    for day in range(len(centers)):
+        members = labels == day
+        if members.any():
+            centers[day] = spherical_mean(lat[members], lon[members])
+
+
+def lloyd(lat: np.ndarray, lon: np.ndarray, hours: np.ndarray, centers: np.ndarray, lower: float, upper: float,
+          max_hours: float, max_iter: int, warmup: int = 5, tol: float = 1e-3) -> DayClusters:
+    """
+    Alternate capacitated assignment and center updates until the assignment
+    stops changing or the cost stops improving by more than tol.
+
+    The first warmup rounds assign every site to its nearest center, which is
+    cheap and moves the centers close to where the capacitated steps settle.
+    """
+    for _ in range(warmup):
+        nearest = haversine_matrix(lat, lon, centers[:, 0], centers[:, 1]).argmin(axis=1)
+        update_centers(lat, lon, nearest, centers)
+
+    labels: Optional[np.ndarray] = None
+    best_labels, best_cost = None, np.inf
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        distances = haversine_matrix(lat, lon, centers[:, 0], centers[:, 1])
+        new_labels = assign_with_capacity(distances, hours, lower, upper, max_hours)
+        cost = float((hours * distances[np.arange(len(lat)), new_labels]).sum())
+        if cost < best_cost:
+            best_labels, best_cost = new_labels, cost
+        if labels is not None and (np.array_equal(new_labels, labels) or cost > previous_cost * (1 - tol)):
+            break
+        labels, previous_cost = new_labels, cost
+        update_centers(lat, lon, labels, centers)
+
+    labels = best_labels
+    update_centers(lat, lon, labels, centers)
+    distances = haversine_matrix(lat, lon, centers[:, 0], centers[:, 1])
+    cost = float((hours * distances[np.arange(len(lat)), labels]).sum())
+    day_hours = np.bincount(labels, weights=hours, minlength=len(centers))
+    return DayClusters(labels, centers, day_hours, cost, iterations)
+
+
+def capacitated_clusters(lat: Sequence[float], lon: Sequence[float], hours: Sequence[float], n_days: int,
+                         max_hours: float, balance: float = 0.1, n_init: int = 1, max_iter: int = 30,
+                         seed: int = 42) -> DayClusters:
+    """
+    Group sites into n_days geographically compact days of at most max_hours each.
+
+    balance is the allowed deviation of a day's total from the average day
+    (0.1 = within 10%). Placing split sites whole can break it; rebalancing
+    moves restore it whenever a single move can, max_hours always holds. The
+    best of n_init seeded runs is returned.
+    """
+    lat, lon, hours = (np.asarray(a, dtype=float) for a in (lat, lon, hours))
+    if n_days < 1 or len(lat) == 0:
+        raise ValueError("Need at least one day and one site")
+    if hours.max() > max_hours:
+        raise ValueError(f"❌ Infeasible: a site needs {hours.max()} hours, more than max_hours={max_hours}.")
+    total_hours = hours.sum()
+    if total_hours > n_days * max_hours:
+        raise ValueError(f"❌ Infeasible: You need {total_hours} hours, but only {n_days * max_hours} hours available "
+                         f"with {n_days} days × {max_hours} hours/day.")
+
+    average = total_hours / n_days
+    lower = max(0.0, np.floor((1 - balance) * average))
+    upper = min(float(max_hours), np.ceil((1 + balance) * average))
+
+    rng = np.random.default_rng(seed)
+    best: Optional[DayClusters] = None
+    for _ in range(n_init):
+        run = lloyd(lat, lon, hours, initial_centers(lat, lon, n_days, rng), lower, upper, max_hours, max_iter)
+        if best is None or run.cost < best.cost - 1e-9:
+            best = run
+    return best
+
+
+def day_spread_km(lat: Sequence[float], lon: Sequence[float], labels: Sequence[int]) -> List[float]:
+    """Mean distance from each day's sites to the day's center, a compactness measure for any clustering."""
+    lat, lon, labels = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float), np.asarray(labels)
+    spreads = []
+    for day in np.unique(labels):
+        members = labels == day
+        center_lat, center_lon = spherical_mean(lat[members], lon[members])
+        spreads.append(float(haversine_matrix(lat[members], lon[members], [center_lat], [center_lon]).mean()))
+    return spreads
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Scraper benchmarks.
+
+Measures pages per second for the HTTP and Selenium extraction backends on
+HTML fixtures served from a local web server, so results do not depend on the
+live site, and the cost of checkpointing a crawl of a given size.
+"""
+
+import argparse
+import functools
+import glob
+import html
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from typing import Any, Dict, List
+
+from selenium.common.exceptions import WebDriverException
+
+from config import OUTPUT_FILES
+from data_manager import DataManager
+from driver_manager import DriverPool, HostRateLimiter
+from scraper import EgyptMonumentsScraper
+
+JSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_files")
+
+
+def _escape(text: str) -> str:
+    # Repeated spaces in scraped text come from &nbsp; on the live pages
+    return html.escape(text).replace("  ", " &nbsp;")
+
+
+def render_fixture(entry: Dict[str, Any]) -> str:
+    """Render a scraped entry back into a detail page using the selectors in config.py."""
+    paragraphs = "".join(f"<p>{_escape(p)}</p>" for p in entry.get("description", "").split("\n") if p)
+    prices = "<br>".join(_escape(line) for line in entry.get("prices", "").split("\n"))
+
+    hours = ""
+    first_day = next(iter(entry.get("opening_hours", {}).values()), None)
+    if first_day:
+        hours = (
+            '<div class="openingHoursSec"><div class="dayOff-fromTo fromTo">'
+            f'<div><span>From</span><p>{_escape(first_day["from"])}</p></div>'
+            f'<div><span>To</span><p>{_escape(first_day["to"])}</p></div>'
+            "</div></div>"
+        )
+
+    slides = []
+    for service in entry.get("services", []):
+        title, _, desc = service.partition(": ")
+        slides.append(f"<div><h3>{_escape(title)}</h3><p>{_escape(desc)}</p></div>")
+
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body>"
+        f'<div class="mainPageTitle"><h1>{_escape(entry.get("name", ""))}</h1></div>'
+        f'<div class="itemInfo">{_escape(entry.get("location", ""))}</div>'
+        f'<div class="txtSection">{paragraphs}</div>'
+        f"{hours}"
+        f'<div class="ticketPriceItem"><span>{prices}</span></div>'
+        f'<div class="servicesSlider">{"".join(slides)}</div>'
+        "</body></html>"
+    )
+
+
+def prepare_fixtures(fixtures_dir: str) -> List[str]:
+    """Return the HTML fixtures in ``fixtures_dir``, rendering them from json_files if it is empty."""
+    pages = sorted(glob.glob(os.path.join(fixtures_dir, "*.html")))
+    if pages:
+        return [os.path.basename(p) for p in pages]
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    names = []
+    for site_type, output_file in OUTPUT_FILES.items():
+        with open(os.path.join(JSON_DIR, output_file), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        for entry in entries:
+            # Slugs repeat across categories (e.g. "aswan"), so prefix the type
+            name = f"{site_type}-{entry['url'].rstrip('/').rsplit('/', 1)[-1]}.html"
+            with open(os.path.join(fixtures_dir, name), "w", encoding="utf-8") as f:
+                f.write(render_fixture(entry))
+            names.append(name)
+    print(f"Rendered {len(names)} fixtures into {fixtures_dir}")
+    return sorted(names)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: str) -> ThreadingHTTPServer:
+    """Serve ``directory`` on a free localhost port in a background thread."""
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_backend(extract, urls: List[str]) -> Dict[str, Any]:
+    """Extract every URL once and return throughput plus the records produced."""
+    records = {}
+    start = time.perf_counter()
+    for url in urls:
+        records[url] = extract(url)
+    elapsed = time.perf_counter() - start
+    return {"pages": len(urls), "seconds": elapsed, "pages_per_second": len(urls) / elapsed, "records": records}
+
+
+def benchmark_extractors(args) -> None:
+    """Compare pages per second of the HTTP and Selenium backends on local fixtures."""
+    fixtures_dir = args.fixtures or tempfile.mkdtemp(prefix="scraper_fixtures_")
+    pages = prepare_fixtures(fixtures_dir)[:args.pages]
+    server = serve_directory(fixtures_dir)
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    urls = [base + page for page in pages]
+
+    # No rate limiting: we are measuring extraction cost, not politeness
+    no_delay = HostRateLimiter(0)
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="scraper_benchmark_")
+    checkpoint_file = os.path.join(work_dir, "checkpoint.jsonl")
+    output_file = os.path.join(work_dir, "output.json")
+
+    http_scraper = EgyptMonumentsScraper("benchmark", base, checkpoint_file, output_file,
+                                         rate_limiter=no_delay, backend="http")
+    results["http"] = time_backend(http_scraper.http_extractor.extract, urls)
+    http_scraper.http_extractor.close()
+
+    with DriverPool(1) as pool:
+        browser_scraper = EgyptMonumentsScraper("benchmark", base, checkpoint_file, output_file,
+                                                driver_pool=pool, rate_limiter=no_delay, backend="selenium")
+        try:
+            results["selenium"] = time_backend(browser_scraper.extract_site_details_with_browser, urls)
+        except WebDriverException as e:
+            print(f"Selenium backend skipped, Chrome is not available: {e}")
+
+    server.shutdown()
+
+    print(f"\nExtraction backends on {len(urls)} fixture pages:")
+    print("=" * 60)
+    for backend, result in results.items():
+        print(f"  {backend:<10} {result['pages_per_second']:8.1f} pages/s  ({result['seconds']:.2f}s total)")
+
+    if len(results) == 2:
+        mismatched = [url for url in urls if results["http"]["records"][url] != results["selenium"]["records"][url]]
+        print(f"  Speedup: {results['http']['pages_per_second'] / results['selenium']['pages_per_second']:.1f}x")
+        print(f"  Records differing between backends: {len(mismatched)}")
+        for url in mismatched[:5]:
+            print(f"    {url}")
+
+
+def sample_entries(count: int) -> List[Dict[str, Any]]:
+    """Build ``count`` realistic entries by cycling through json_files with unique URLs."""
+    source = []
+    for output_file in OUTPUT_FILES.values():
+        with open(os.path.join(JSON_DIR, output_file), "r", encoding="utf-8") as f:
+            source.extend(json.load(f))
+    return [dict(source[i % len(source)], url=f"{source[i % len(source)]['url']}?page={i}") for i in range(count)]
+
+
+def rewrite_checkpoint_cost(entries: List[Dict[str, Any]], path: str, samples: int = 10) -> Dict[str, float]:
+    """Estimate the previous strategy: rewrite the whole checkpoint with indent=2 after every page.
+
+    A full crawl is quadratic, so rewrites are timed at ``samples`` evenly spaced
+    sizes and the per-entry cost is summed over all n = 1..N writes.
+    """
+    total = len(entries)
+    sizes = sorted({max(1, total * k // samples) for k in range(1, samples + 1)})
+    seconds = written = 0.0
+    for n in sizes:
+        data = {entry["url"]: entry for entry in entries[:n]}
+        start = time.perf_counter()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        seconds += time.perf_counter() - start
+        written += os.path.getsize(path)
+
+    writes = total * (total + 1) / 2  # entries serialised over the whole crawl
+    return {"seconds": seconds / sum(sizes) * writes, "bytes": written / sum(sizes) * writes}
+
+
+def journal_checkpoint_cost(entries: List[Dict[str, Any]], work_dir: str) -> Dict[str, float]:
+    """Measure appending every entry to the journal plus periodic and final compaction."""
+    manager = DataManager(os.path.join(work_dir, "checkpoint.jsonl"), os.path.join(work_dir, "output.json"))
+    results = {}
+    written = 0
+    start = time.perf_counter()
+    for entry in entries:
+        results[entry["url"]] = entry
+        manager.append_entry(entry["url"], entry)
+        if manager.needs_compaction():
+            written += os.path.getsize(manager.checkpoint_file)
+            manager.compact(results)
+            written += os.path.getsize(manager.output_file)
+    written += os.path.getsize(manager.checkpoint_file)
+    manager.compact(results)
+    seconds = time.perf_counter() - start
+    written += os.path.getsize(manager.output_file)
+    return {"seconds": seconds, "bytes": written}
+
+
+def benchmark_checkpoints(args) -> None:
+    """Compare whole-file checkpoint rewrites with the append-only journal."""
+    print("Checkpoint cost over a full crawl:")
+    print("=" * 60)
+    for count in args.entries:
+        entries = sample_entries(count)
+        work_dir = tempfile.mkdtemp(prefix="checkpoint_benchmark_")
+        rewrite = rewrite_checkpoint_cost(entries, os.path.join(work_dir, "rewrite.json"))
+        journal = journal_checkpoint_cost(entries, work_dir)
+
+        print(f"\n  {count} entries:")
+        print(f"    full rewrite (estimated) {rewrite['seconds']:10.2f}s  {rewrite['bytes'] / 1e6:12.1f} MB written")
+        print(f"    append-only journal      {journal['seconds']:10.2f}s  {journal['bytes'] / 1e6:12.1f} MB written")
+        print(f"    speedup: {rewrite['seconds'] / journal['seconds']:.0f}x")
+
+
+def main():
+    """Main entry point with argument parsing."""
+    parser = argparse.ArgumentParser(description="Benchmarks for the Egyptian monuments scraper")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    extractors = subparsers.add_parser("extractors", help="Compare HTTP and Selenium extraction throughput")
+    extractors.add_argument(
+        "--fixtures",
+        help="Directory of saved detail pages (*.html). Rendered from json_files/ when empty or omitted"
+    )
+    extractors.add_argument("--pages", type=int, default=50, help="Maximum number of fixture pages to extract")
+    extractors.set_defaults(func=benchmark_extractors)
+
+    checkpoints = subparsers.add_parser("checkpoints", help="Compare checkpoint rewrites with the append-only journal")
+    checkpoints.add_argument("--entries", type=int, nargs="+", default=[1000, 10000],
+                             help="Crawl sizes to simulate (default: 1000 10000)")
+    checkpoints.set_defaults(func=benchmark_checkpoints)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
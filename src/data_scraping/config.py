@@ -1,5 +1,7 @@
 """Configuration settings for the web scraper."""
 
+import os
+
 # Base configurations
 BASE_URLS = {
     "museums": "https://egymonuments.gov.eg/en/museums",
@@ -15,19 +17,46 @@ OUTPUT_FILES = {
     "sunken-monuments": "sunken_monuments.json"
 }
 
+# Append-only JSON-lines journals, compacted into OUTPUT_FILES
 CHECKPOINT_FILES = {
-    "museums": "museums_checkpoint.json",
-    "archaeological-sites": "archaeological_sites_checkpoint.json", 
-    "monuments": "monuments_checkpoint.json",
-    "sunken-monuments": "sunken_monuments_checkpoint.json"
+    "museums": "museums_checkpoint.jsonl",
+    "archaeological-sites": "archaeological_sites_checkpoint.jsonl", 
+    "monuments": "monuments_checkpoint.jsonl",
+    "sunken-monuments": "sunken_monuments_checkpoint.jsonl"
+}
+
+# Per-URL ETag/Last-Modified and content hashes used by --refresh
+FINGERPRINT_FILES = {
+    "museums": "museums_fingerprints.json",
+    "archaeological-sites": "archaeological_sites_fingerprints.json",
+    "monuments": "monuments_fingerprints.json",
+    "sunken-monuments": "sunken_monuments_fingerprints.json"
 }
 
 # Scraping settings
 SCROLL_ATTEMPTS = 3
 SCROLL_DELAY = 1
-REQUEST_DELAY = 1
+REQUEST_DELAY = 1  # Minimum seconds between two requests to the same host
 DEFAULT_TIMEOUT = 20
 
+# Checkpoint journal settings
+JOURNAL_FSYNC_EVERY = 20  # fsync the journal after this many records
+JOURNAL_COMPACT_EVERY = 500  # Fold the journal into the output file after this many records
+
+# Driver pool settings
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+MAX_PAGES_PER_DRIVER = 25  # Recycle a Chrome instance after this many pages
+
+# Extraction backends: "http" parses static HTML and falls back to Selenium,
+# "selenium" always renders the page in a browser
+BACKENDS = ["http", "selenium"]
+DEFAULT_BACKEND = "http"
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
 # Time constants
 WEEK_DAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
 
@@ -46,4 +75,8 @@ SELECTORS = {
     "services_details": ".servicesDetails",
     "services_headings": "h2, h3, strong",
     "services_content": "p, li"
-}
\ No newline at end of file
+}
+
+# Selectors that must be present in the static HTML for the HTTP backend to
+# trust it; otherwise the page is re-scraped with Selenium
+REQUIRED_SELECTORS = ["title", "location", "description_container"]
\ No newline at end of file
@@ -2,44 +2,196 @@
 
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import JOURNAL_FSYNC_EVERY, JOURNAL_COMPACT_EVERY
 
 
 class DataManager:
-    """Handles saving and loading of scraped data and checkpoints."""
+    """Handles saving and loading of scraped data and checkpoints.
+    
+    Progress is appended to a JSON-lines journal, one record per page, and
+    periodically compacted into the output file. The checkpoint state is the
+    output file plus every journal record replayed on top of it.
+    """
     
-    def __init__(self, checkpoint_file: str, output_file: str):
+    def __init__(self, checkpoint_file: str, output_file: str, fingerprint_file: Optional[str] = None,
+                 fsync_every: int = JOURNAL_FSYNC_EVERY, compact_every: int = JOURNAL_COMPACT_EVERY):
         self.checkpoint_file = checkpoint_file
         self.output_file = output_file
+        self.fingerprint_file = fingerprint_file
+        self.fsync_every = fsync_every
+        self.compact_every = compact_every
+        self._journal = None
+        self._unsynced = 0
+        self._since_compaction = 0
     
     def load_checkpoint(self) -> Dict[str, Any]:
         """Load existing checkpoint data if available."""
-        if os.path.exists(self.checkpoint_file):
-            try:
-                with open(self.checkpoint_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Warning: Could not load checkpoint file {self.checkpoint_file}: {e}")
-                return {}
-        return {}
-    
-    def save_checkpoint(self, data: Dict[str, Any]) -> None:
-        """Save current progress to checkpoint file."""
+        data = {}
+        snapshot = self._load_json(self.output_file, [])
+        legacy = self._load_json(self._legacy_checkpoint_file(), {})
+        for entry in list(snapshot) + list(legacy.values()):
+            if isinstance(entry, dict) and entry.get("url"):
+                data[entry["url"]] = entry
+        
+        entries, _ = self._replay_journal()
+        data.update(entries)
+        return data
+    
+    def load_fingerprints(self) -> Dict[str, Dict[str, str]]:
+        """Load the per-URL page fingerprints saved by previous runs."""
+        fingerprints = self._load_json(self.fingerprint_file, {}) if self.fingerprint_file else {}
+        _, journaled = self._replay_journal()
+        fingerprints.update(journaled)
+        return fingerprints
+    
+    def append_entry(self, url: str, entry: Optional[Dict[str, Any]],
+                     fingerprint: Optional[Dict[str, str]] = None) -> None:
+        """Append one page to the checkpoint journal.
+        
+        ``entry`` may be ``None`` to record only a new fingerprint for an
+        unchanged page. Records are flushed immediately and fsynced in batches
+        of ``fsync_every``.
+        """
+        record = {"url": url, "entry": entry, "fingerprint": fingerprint}
         try:
-            with open(self.checkpoint_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            journal = self._open_journal()
+            journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            journal.flush()
+            self._unsynced += 1
+            self._since_compaction += 1
+            if self._unsynced >= self.fsync_every:
+                self.sync()
         except IOError as e:
             print(f"Warning: Could not save checkpoint: {e}")
     
-    def save_final_results(self, results: Dict[str, Any]) -> None:
-        """Save final results to output file."""
-        final_list = list(results.values())
+    def sync(self) -> None:
+        """Force journal records written so far to disk."""
+        if self._journal is not None and self._unsynced:
+            os.fsync(self._journal.fileno())
+            self._unsynced = 0
+    
+    def needs_compaction(self) -> bool:
+        """Whether enough records were journaled since the last compaction."""
+        return self._since_compaction >= self.compact_every
+    
+    def compact(self, results: Dict[str, Any], fingerprints: Optional[Dict[str, Dict[str, str]]] = None) -> bool:
+        """Fold the journal into the output file (and fingerprint file), then truncate it.
+        
+        Both files are replaced atomically, so a crash during compaction leaves
+        either the old snapshot plus the full journal or the new snapshot.
+        """
         try:
-            with open(self.output_file, "w", encoding="utf-8") as f:
-                json.dump(final_list, f, ensure_ascii=False, indent=2)
-            print(f"Saved {len(final_list)} entries to {self.output_file}")
+            self._write_atomic(self.output_file, list(results.values()))
+            if self.fingerprint_file and fingerprints is not None:
+                self._write_atomic(self.fingerprint_file, fingerprints)
         except IOError as e:
-            print(f"Error: Could not save final results: {e}")
+            print(f"Warning: Could not compact checkpoint journal: {e}")
+            return False
+        
+        self.close()
+        with open(self.checkpoint_file, "w", encoding="utf-8"):
+            pass
+        self._since_compaction = 0
+        
+        legacy = self._legacy_checkpoint_file()
+        if legacy and os.path.exists(legacy):
+            os.remove(legacy)
+        return True
+    
+    def has_journal(self) -> bool:
+        """Whether the journal holds records that are not compacted yet."""
+        self.close()
+        return os.path.exists(self.checkpoint_file) and os.path.getsize(self.checkpoint_file) > 0
+    
+    def close(self) -> None:
+        """Sync and close the journal."""
+        if self._journal is not None:
+            self.sync()
+            self._journal.close()
+            self._journal = None
+    
+    def save_final_results(self, results: Dict[str, Any],
+                           fingerprints: Optional[Dict[str, Dict[str, str]]] = None) -> None:
+        """Save final results to output file."""
+        if self.compact(results, fingerprints):
+            print(f"Saved {len(results)} entries to {self.output_file}")
+    
+    def _open_journal(self):
+        if self._journal is None:
+            self._drop_torn_tail()
+            self._journal = open(self.checkpoint_file, "a", encoding="utf-8")
+        return self._journal
+    
+    def _drop_torn_tail(self) -> None:
+        """Cut a partially written last record so new records start on a fresh line."""
+        if not os.path.exists(self.checkpoint_file):
+            return
+        with open(self.checkpoint_file, "rb+") as f:
+            content = f.read()
+            if content and not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+    
+    def _replay_journal(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, str]]]:
+        """Replay the journal into ``(entries, fingerprints)``, later records winning."""
+        entries, fingerprints = {}, {}
+        if not os.path.exists(self.checkpoint_file):
+            return entries, fingerprints
+        
+        try:
+            with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        except (IOError, UnicodeDecodeError) as e:
+            print(f"Warning: Could not load checkpoint file {self.checkpoint_file}: {e}")
+            return entries, fingerprints
+        
+        for lineno, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Only the last record can be torn by a crash mid-write
+                torn = lineno == len(lines)
+                print(f"Warning: Ignoring {'torn last' if torn else 'corrupt'} record "
+                      f"at line {lineno} of {self.checkpoint_file}")
+                continue
+            
+            url = record.get("url")
+            if not url:
+                continue
+            if record.get("entry") is not None:
+                entries[url] = record["entry"]
+            if record.get("fingerprint"):
+                fingerprints[url] = record["fingerprint"]
+        
+        return entries, fingerprints
+    
+    def _legacy_checkpoint_file(self) -> str:
+        """Path of the JSON checkpoint written by older versions of the scraper."""
+        legacy = os.path.splitext(self.checkpoint_file)[0] + ".json"
+        return legacy if legacy != self.checkpoint_file else ""
+    
+    @staticmethod
+    def _load_json(path: str, default):
+        if not path or not os.path.exists(path):
+            return default
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Could not load {path}: {e}")
+            return default
+    
+    @staticmethod
+    def _write_atomic(path: str, data) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
     
     def backup_existing_file(self) -> None:
         """Create a backup of existing output file if it exists."""
@@ -5,9 +5,15 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import queue
+import threading
 import time
 
+from config import MAX_PAGES_PER_DRIVER
+
 
 class DriverManager:
     """Manages Chrome WebDriver instances with consistent configuration."""
@@ -45,4 +51,117 @@ class DriverManager:
         """Scroll to bottom of page to trigger lazy loading."""
         for _ in range(attempts):
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(delay)
\ No newline at end of file
+            time.sleep(delay)
+
+
+class DriverPool:
+    """Bounded pool of long-lived WebDriver instances shared by scraping workers.
+
+    Drivers are created lazily, handed out one per worker and recycled after
+    ``max_pages`` pages or as soon as a page load crashes the browser.
+    """
+
+    def __init__(self, size: int, max_pages: int = MAX_PAGES_PER_DRIVER, factory=None):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self._factory = factory or DriverManager.create_driver
+        self._idle = queue.Queue()
+        self._pages = {}
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Return an idle driver, starting a new one if the pool is not full."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if not can_create:
+            return self._idle.get(timeout=timeout)
+
+        try:
+            driver = self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._pages[driver] = 0
+        return driver
+
+    def release(self, driver, crashed: bool = False) -> None:
+        """Return a driver to the pool, retiring it if it crashed or is worn out."""
+        with self._lock:
+            pages = self._pages.get(driver, 0) + 1
+            self._pages[driver] = pages
+
+        if crashed or pages >= self.max_pages:
+            self._retire(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def lease(self):
+        """Context manager that borrows a driver for the duration of one page."""
+        driver = self.acquire()
+        crashed = False
+        try:
+            yield driver
+        except WebDriverException:
+            crashed = True
+            raise
+        finally:
+            self.release(driver, crashed)
+
+    def close(self) -> None:
+        """Quit every idle driver. Call once all workers have released theirs."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._retire(driver)
+
+    def _retire(self, driver) -> None:
+        with self._lock:
+            self._pages.pop(driver, None)
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HostRateLimiter:
+    """Enforces a minimum interval between requests to the same host.
+
+    Workers reserve the next free slot for a host under a lock and sleep
+    outside of it, so requests to different hosts never wait on each other.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        """Block until a request to the host of ``url`` is allowed."""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
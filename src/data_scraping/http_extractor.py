@@ -0,0 +1,216 @@
+"""HTTP-only extraction backend for static detail pages."""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from config import SELECTORS, WEEK_DAYS, REQUIRED_SELECTORS, DEFAULT_TIMEOUT, HTTP_HEADERS
+
+
+_HTML_WHITESPACE = re.compile(r"[ \t\r\n\f]+")
+
+
+def _clean(text: str) -> str:
+    """Collapse source whitespace the way a browser renders it.
+
+    Non-breaking spaces survive collapsing and become plain spaces, matching
+    the ``.text`` that Selenium returns.
+    """
+    return _HTML_WHITESPACE.sub(" ", text).replace("\xa0", " ").strip()
+
+
+class HttpDataExtractor:
+    """Fetches detail pages over pooled HTTP connections and parses them without a browser.
+
+    Uses the same ``SELECTORS`` map as :class:`extractors.DataExtractor`, so both
+    backends produce identical records for pages that do not depend on JavaScript.
+    """
+
+    def __init__(self, pool_size: int = 1, timeout: int = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HTTP_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url: str, fingerprint: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
+        """Download a page, returning ``None`` if it could not be fetched.
+
+        When a previous ``fingerprint`` is given the request is made conditional
+        on its ETag/Last-Modified, and an unchanged page comes back as a 304.
+        """
+        headers = {}
+        if fingerprint:
+            if fingerprint.get("etag"):
+                headers["If-None-Match"] = fingerprint["etag"]
+            if fingerprint.get("last_modified"):
+                headers["If-Modified-Since"] = fingerprint["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for {url}: {e}")
+            return None
+        response.encoding = response.encoding or "utf-8"
+        return response
+
+    @staticmethod
+    def fingerprint(response: requests.Response) -> Dict[str, str]:
+        """Build the validators and content hash used to detect changed pages."""
+        return {
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", ""),
+            "content_hash": hashlib.sha256(response.content).hexdigest(),
+        }
+
+    def extract(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a detail page.
+
+        Returns ``None`` when the page could not be fetched or a required
+        selector is missing, signalling the caller to fall back to Selenium.
+        """
+        response = self.fetch(url)
+        if response is None:
+            return None
+        return self.parse(url, response.text)
+
+    def parse(self, url: str, html: str) -> Optional[Dict[str, Any]]:
+        """Parse already downloaded HTML into a site record."""
+        soup = BeautifulSoup(html, "lxml")
+
+        missing = [key for key in REQUIRED_SELECTORS if soup.select_one(SELECTORS[key]) is None]
+        if missing:
+            print(f"Static page for {url} is missing {', '.join(missing)}")
+            return None
+
+        return {
+            "url": url,
+            "name": self.extract_name(soup),
+            "location": self.extract_location(soup),
+            "description": self.extract_description(soup),
+            "opening_hours": self.extract_opening_hours(soup),
+            "prices": self.extract_prices(soup),
+            "services": self.extract_services(soup),
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+    @staticmethod
+    def extract_name(soup) -> str:
+        """Extract the name/title of the site."""
+        name_el = soup.select_one(SELECTORS["title"])
+        return _clean(name_el.get_text()) if name_el else ""
+
+    @staticmethod
+    def extract_location(soup) -> str:
+        """Extract location information."""
+        loc_el = soup.select_one(SELECTORS["location"])
+        return _clean(loc_el.get_text()) if loc_el else ""
+
+    @staticmethod
+    def extract_description(soup) -> str:
+        """Extract description from paragraphs."""
+        desc_container = soup.select_one(SELECTORS["description_container"])
+        if desc_container is None:
+            return ""
+        paragraphs = (_clean(p.get_text()) for p in desc_container.find_all(SELECTORS["description_paragraphs"]))
+        return "\n".join(p for p in paragraphs if p)
+
+    @staticmethod
+    def extract_opening_hours(soup) -> Dict[str, Dict[str, str]]:
+        """Extract opening hours information."""
+
+        def block_after(div, label):
+            # Mirrors the XPath .//div[./span[text()='label']]/p used by the Selenium backend
+            for span in div.find_all("span"):
+                if span.get_text().strip() == label and span.parent.name == "div":
+                    p = span.parent.find("p", recursive=False)
+                    if p is not None:
+                        return p
+            return None
+
+        def parse_time(block):
+            text = _clean(block.get_text())
+            parts = text.split()
+            if len(parts) >= 2:
+                return parts[0] + " " + parts[1]
+            return text
+
+        sample = None
+        for div in soup.select(SELECTORS["opening_hours"]):
+            from_block = block_after(div, "From")
+            to_block = block_after(div, "To")
+            if from_block is None or to_block is None:
+                continue
+
+            sample = {
+                "from": parse_time(from_block),
+                "to": parse_time(to_block)
+            }
+            if sample["from"] and sample["to"]:
+                break
+
+        if not sample:
+            return {}
+        return {day: sample.copy() for day in WEEK_DAYS}
+
+    @staticmethod
+    def extract_prices(soup) -> str:
+        """Extract pricing information."""
+        price_span = soup.select_one(SELECTORS["prices"])
+        if price_span is None:
+            return ""
+        # <br> tags become line breaks, as in the rendered text
+        for br in price_span.find_all("br"):
+            br.replace_with("\n")
+        raw = price_span.get_text()
+        return "\n".join(_clean(line) for line in raw.replace("\\", " ").splitlines() if line.strip())
+
+    @staticmethod
+    def extract_services(soup) -> List[str]:
+        """Extract services information using the same strategies as the Selenium backend."""
+        services = []
+
+        def add_service(txt):
+            txt = txt.strip()
+            if txt and txt not in services:
+                services.append(txt)
+
+        # Strategy 1: .servicesSlider. Without JavaScript slick never adds its
+        # .slick-slide classes, so fall back to the slider's direct children.
+        slider = soup.select_one(SELECTORS["services_slider"])
+        if slider is not None:
+            slides = slider.select(SELECTORS["services_slides"]) or slider.find_all(recursive=False)
+            for slide in slides:
+                title_el = slide.select_one("h3")
+                p_el = slide.select_one("p")
+                title = _clean(title_el.get_text()) if title_el else ""
+                desc = _clean(p_el.get_text()) if p_el else ""
+
+                if title or desc:
+                    combined = title if title else ""
+                    if desc:
+                        combined = f"{combined}: {desc}" if title else desc
+                    add_service(combined)
+
+        # Strategy 2: Fallback to .servicesDetails if nothing found
+        if not services:
+            for cont in soup.select(SELECTORS["services_details"]):
+                for h in cont.select(SELECTORS["services_headings"]):
+                    add_service(_clean(h.get_text()))
+
+                for p in cont.select(SELECTORS["services_content"]):
+                    add_service(_clean(p.get_text()))
+
+                if not services:
+                    add_service(_clean(cont.get_text()))
+
+        return services
@@ -7,10 +7,12 @@ Main script with command-line interface for scraping museums, archaeological sit
 import sys
 import argparse
 from scraper import EgyptMonumentsScraper
-from config import BASE_URLS, OUTPUT_FILES, CHECKPOINT_FILES
+from driver_manager import DriverPool, HostRateLimiter
+from config import BASE_URLS, OUTPUT_FILES, CHECKPOINT_FILES, FINGERPRINT_FILES, DEFAULT_WORKERS, REQUEST_DELAY, BACKENDS, DEFAULT_BACKEND
 
 
-def create_scraper(site_type: str) -> EgyptMonumentsScraper:
+def create_scraper(site_type: str, workers: int = 1, driver_pool: DriverPool = None,
+                   rate_limiter: HostRateLimiter = None, backend: str = DEFAULT_BACKEND) -> EgyptMonumentsScraper:
     """Create a scraper instance for the specified site type."""
     if site_type not in BASE_URLS:
         raise ValueError(f"Invalid site type: {site_type}. Available types: {list(BASE_URLS.keys())}")
@@ -19,15 +21,21 @@ def create_scraper(site_type: str) -> EgyptMonumentsScraper:
         site_type=site_type,
         base_url=BASE_URLS[site_type],
         checkpoint_file=CHECKPOINT_FILES[site_type],
-        output_file=OUTPUT_FILES[site_type]
+        output_file=OUTPUT_FILES[site_type],
+        workers=workers,
+        driver_pool=driver_pool,
+        rate_limiter=rate_limiter,
+        backend=backend,
+        fingerprint_file=FINGERPRINT_FILES[site_type]
     )
 
 
-def scrape_single_type(site_type: str) -> None:
+def scrape_single_type(site_type: str, workers: int = DEFAULT_WORKERS, backend: str = DEFAULT_BACKEND,
+                       refresh: bool = False) -> None:
     """Scrape a single site type."""
     try:
-        scraper = create_scraper(site_type)
-        scraper.scrape_all()
+        scraper = create_scraper(site_type, workers, backend=backend)
+        scraper.scrape_all(refresh)
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -38,22 +46,27 @@ def scrape_single_type(site_type: str) -> None:
         sys.exit(1)
 
 
-def scrape_all_types() -> None:
+def scrape_all_types(workers: int = DEFAULT_WORKERS, backend: str = DEFAULT_BACKEND, refresh: bool = False) -> None:
     """Scrape all available site types."""
-    for site_type in BASE_URLS.keys():
-        print(f"\n{'='*50}")
-        print(f"Starting scrape of {site_type.upper()}")
-        print(f"{'='*50}")
+    # One pool and rate limiter for every type, so Chrome instances are reused
+    # across categories and the shared host is never hit faster than allowed
+    with DriverPool(workers) as driver_pool:
+        rate_limiter = HostRateLimiter(REQUEST_DELAY)
         
-        try:
-            scraper = create_scraper(site_type)
-            scraper.scrape_all()
-        except KeyboardInterrupt:
-            print(f"\nScraping interrupted. You can resume later by running the script again.")
-            break
-        except Exception as e:
-            print(f"Error scraping {site_type}: {e}")
-            continue
+        for site_type in BASE_URLS.keys():
+            print(f"\n{'='*50}")
+            print(f"Starting scrape of {site_type.upper()}")
+            print(f"{'='*50}")
+            
+            try:
+                scraper = create_scraper(site_type, workers, driver_pool, rate_limiter, backend)
+                scraper.scrape_all(refresh)
+            except KeyboardInterrupt:
+                print(f"\nScraping interrupted. You can resume later by running the script again.")
+                break
+            except Exception as e:
+                print(f"Error scraping {site_type}: {e}")
+                continue
     
     print(f"\n{'='*50}")
     print("All scraping tasks completed!")
@@ -91,6 +104,9 @@ Examples:
   python main.py --type archaeological-sites      # Scrape only archaeological sites  
   python main.py --type sunken-monuments          # Scrape only sunken monuments
   python main.py --all                            # Scrape all types
+  python main.py --all --workers 4                # Scrape all types with 4 workers
+  python main.py --all --backend selenium         # Render every page in Chrome
+  python main.py --all --refresh                  # Re-extract only pages that changed
   python main.py --stats                          # Show statistics
         """
     )
@@ -112,6 +128,27 @@ Examples:
         help="Show scraping statistics"
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of concurrent browser workers (default: {DEFAULT_WORKERS})"
+    )
+    
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=DEFAULT_BACKEND,
+        help="Extraction backend: 'http' parses static HTML and falls back to Selenium "
+             f"when a required selector is missing (default: {DEFAULT_BACKEND})"
+    )
+    
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-check already scraped pages with conditional requests and re-extract only changed ones"
+    )
+    
     parser.add_argument(
         "--list-types",
         action="store_true", 
@@ -120,6 +157,9 @@ Examples:
     
     args = parser.parse_args()
     
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    
     if args.list_types:
         print("Available site types:")
         for site_type, url in BASE_URLS.items():
@@ -129,9 +169,9 @@ Examples:
     if args.stats:
         show_statistics()
     elif args.all:
-        scrape_all_types()
+        scrape_all_types(args.workers, args.backend, args.refresh)
     elif args.type:
-        scrape_single_type(args.type)
+        scrape_single_type(args.type, args.workers, args.backend, args.refresh)
 
 
 if __name__ == "__main__":
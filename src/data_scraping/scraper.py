@@ -1,102 +1,171 @@
 """Main scraper class that orchestrates the scraping process."""
 
-import time
+import queue
+import threading
 from urllib.parse import urljoin
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import WebDriverException, NoSuchElementException
 
-from driver_manager import DriverManager
+from driver_manager import DriverManager, DriverPool, HostRateLimiter
 from extractors import DataExtractor
+from http_extractor import HttpDataExtractor
 from data_manager import DataManager
-from config import SELECTORS, REQUEST_DELAY, SCROLL_ATTEMPTS, SCROLL_DELAY, DEFAULT_TIMEOUT
+from config import SELECTORS, REQUEST_DELAY, SCROLL_ATTEMPTS, SCROLL_DELAY, DEFAULT_TIMEOUT, DEFAULT_BACKEND
 
 
 class EgyptMonumentsScraper:
     """Main scraper class for Egyptian monuments website."""
     
-    def __init__(self, site_type: str, base_url: str, checkpoint_file: str, output_file: str):
+    def __init__(self, site_type: str, base_url: str, checkpoint_file: str, output_file: str,
+                 workers: int = 1, driver_pool: Optional[DriverPool] = None,
+                 rate_limiter: Optional[HostRateLimiter] = None, backend: str = DEFAULT_BACKEND,
+                 fingerprint_file: Optional[str] = None):
         self.site_type = site_type
         self.base_url = base_url
-        self.data_manager = DataManager(checkpoint_file, output_file)
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.data_manager = DataManager(checkpoint_file, output_file, fingerprint_file)
         self.extractor = DataExtractor()
+        # Also used by the Selenium backend for conditional requests in refresh mode
+        self.http_extractor = HttpDataExtractor(self.workers)
+        
+        # A pool passed in by the caller is shared across scrapers and closed by it
+        self._owns_pool = driver_pool is None
+        self.driver_pool = driver_pool or DriverPool(self.workers)
+        self.rate_limiter = rate_limiter or HostRateLimiter(REQUEST_DELAY)
     
     def get_site_list(self) -> List[Dict[str, Any]]:
         """Get list of all sites from the main listing page."""
-        driver = DriverManager.create_driver()
+        self.rate_limiter.wait(self.base_url)
         try:
-            print(f"Loading main page: {self.base_url}")
-            driver.get(self.base_url)
-            
-            # Wait for the listing container to load
-            DriverManager.wait_for_element(driver, SELECTORS["listing_container"])
-            
-            # Scroll to load lazy-loaded content
-            DriverManager.scroll_to_load_content(driver, SCROLL_ATTEMPTS, SCROLL_DELAY)
-            
-            # Find the listing container and extract items
-            try:
-                listing_div = driver.find_element(By.CSS_SELECTOR, SELECTORS["listing_container"])
-                items = listing_div.find_elements(By.CSS_SELECTOR, SELECTORS["list_items"])
-            except NoSuchElementException:
-                print(f"Warning: Could not find listing container for {self.site_type}")
-                return []
-            
-            sites = []
-            seen_urls = set()
-            
-            for item in items:
-                href = item.get_attribute("href") or ""
-                full_url = urljoin(self.base_url, href)
-                
-                if full_url in seen_urls or not full_url.startswith("http"):
-                    continue
-                    
-                seen_urls.add(full_url)
-                sites.append({"name": None, "url": full_url})
-            
-            print(f"Found {len(sites)} {self.site_type} on main page")
-            return sites
-            
+            with self.driver_pool.lease() as driver:
+                return self._collect_site_list(driver)
         except WebDriverException as e:
             print(f"Error loading main page: {e}")
             return []
-        finally:
-            driver.quit()
     
-    def extract_site_details(self, url: str, timeout: int = DEFAULT_TIMEOUT) -> Dict[str, Any]:
-        """Extract detailed information from a single site page."""
-        driver = DriverManager.create_driver()
+    def _collect_site_list(self, driver) -> List[Dict[str, Any]]:
+        """Load the listing page in ``driver`` and collect the detail page URLs."""
+        print(f"Loading main page: {self.base_url}")
+        driver.get(self.base_url)
+        
+        # Wait for the listing container to load
+        DriverManager.wait_for_element(driver, SELECTORS["listing_container"])
+        
+        # Scroll to load lazy-loaded content
+        DriverManager.scroll_to_load_content(driver, SCROLL_ATTEMPTS, SCROLL_DELAY)
+        
+        # Find the listing container and extract items
         try:
-            print(f"Extracting details from: {url}")
-            driver.get(url)
-            
-            # Wait for main content to load
-            DriverManager.wait_for_element(driver, SELECTORS["title"], timeout)
+            listing_div = driver.find_element(By.CSS_SELECTOR, SELECTORS["listing_container"])
+            items = listing_div.find_elements(By.CSS_SELECTOR, SELECTORS["list_items"])
+        except NoSuchElementException:
+            print(f"Warning: Could not find listing container for {self.site_type}")
+            return []
+        
+        sites = []
+        seen_urls = set()
+        
+        for item in items:
+            href = item.get_attribute("href") or ""
+            full_url = urljoin(self.base_url, href)
             
-            # Extract all data using the DataExtractor
-            details = {
-                "url": url,
-                "name": self.extractor.extract_name(driver),
-                "location": self.extractor.extract_location(driver),
-                "description": self.extractor.extract_description(driver),
-                "opening_hours": self.extractor.extract_opening_hours(driver),
-                "prices": self.extractor.extract_prices(driver),
-                "services": self.extractor.extract_services(driver),
-            }
+            if full_url in seen_urls or not full_url.startswith("http"):
+                continue
+                
+            seen_urls.add(full_url)
+            sites.append({"name": None, "url": full_url})
+        
+        print(f"Found {len(sites)} {self.site_type} on main page")
+        return sites
+    
+    def extract_site_details(self, url: str, timeout: int = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """Extract detailed information from a single site page.
+        
+        With the HTTP backend the static HTML is tried first; the browser is
+        only started when a required selector is missing from it.
+        """
+        details, _ = self.fetch_site(url, timeout=timeout)
+        return details
+    
+    def fetch_site(self, url: str, previous: Optional[Dict[str, str]] = None,
+                   timeout: int = DEFAULT_TIMEOUT) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """Extract a site page unless it is unchanged since ``previous`` was recorded.
+        
+        Returns ``(details, fingerprint)``. ``details`` is ``None`` when the server
+        answered the conditional request with 304 or the content hash matches
+        ``previous``; ``fingerprint`` is ``None`` if the page was only rendered
+        in the browser.
+        """
+        fingerprint = None
+        if self.backend == "http" or previous is not None:
+            self.rate_limiter.wait(url)
+            response = self.http_extractor.fetch(url, previous)
             
-            return details
+            if response is not None:
+                if response.status_code == 304:
+                    return None, previous
+                
+                fingerprint = HttpDataExtractor.fingerprint(response)
+                if previous and fingerprint["content_hash"] == previous.get("content_hash"):
+                    return None, fingerprint
+                
+                if self.backend == "http":
+                    details = self.http_extractor.parse(url, response.text)
+                    if details is not None:
+                        print(f"Extracted details over HTTP from: {url}")
+                        return details, fingerprint
+                    print(f"Falling back to Selenium for: {url}")
+        
+        return self.extract_site_details_with_browser(url, timeout), fingerprint
+    
+    def extract_site_details_with_browser(self, url: str, timeout: int = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """Extract detailed information from a single site page rendered in Chrome."""
+        self.rate_limiter.wait(url)
+        try:
+            with self.driver_pool.lease() as driver:
+                print(f"Extracting details from: {url}")
+                driver.get(url)
+                
+                # Wait for main content to load
+                DriverManager.wait_for_element(driver, SELECTORS["title"], timeout)
+                
+                # Extract all data using the DataExtractor
+                details = {
+                    "url": url,
+                    "name": self.extractor.extract_name(driver),
+                    "location": self.extractor.extract_location(driver),
+                    "description": self.extractor.extract_description(driver),
+                    "opening_hours": self.extractor.extract_opening_hours(driver),
+                    "prices": self.extractor.extract_prices(driver),
+                    "services": self.extractor.extract_services(driver),
+                }
+                
+                return details
             
         except WebDriverException as e:
             print(f"Error extracting details from {url}: {e}")
             raise
-        finally:
-            driver.quit()
     
-    def scrape_all(self) -> None:
-        """Main method to scrape all sites of the given type."""
-        print(f"Starting scrape of {self.site_type}")
+    def scrape_all(self, refresh: bool = False) -> None:
+        """Main method to scrape all sites of the given type.
+        
+        In refresh mode sites already in the checkpoint are re-checked with
+        conditional requests and only re-extracted if their page changed.
+        """
+        print(f"Starting {'refresh' if refresh else 'scrape'} of {self.site_type}")
         
+        try:
+            self._scrape_pending(refresh)
+        finally:
+            self.data_manager.close()
+            if self._owns_pool:
+                self.driver_pool.close()
+            self.http_extractor.close()
+    
+    def _scrape_pending(self, refresh: bool) -> None:
+        """Scrape every listed site that is not in the checkpoint yet, or every site when refreshing."""
         # Get list of all sites
         all_sites = self.get_site_list()
         if not all_sites:
@@ -107,45 +176,90 @@ class EgyptMonumentsScraper:
         results = self.data_manager.load_checkpoint()
         initial_count = len(results)
         
+        fingerprints = self.data_manager.load_fingerprints()
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        
         if initial_count > 0:
             print(f"Resuming from checkpoint with {initial_count} entries")
         
-        # Process each site
+        # Queue every site that still needs scraping
+        pending = queue.Queue()
         for i, site in enumerate(all_sites, 1):
             url = site["url"]
             
-            if url in results:
+            if url in results and not refresh:
                 print(f"[{i}/{len(all_sites)}] Skipping already scraped: {url}")
                 continue
             
-            try:
-                print(f"[{i}/{len(all_sites)}] Scraping: {url}")
-                details = self.extract_site_details(url)
-                results[url] = details
-                
-                # Save progress after each successful extraction
-                self.data_manager.save_checkpoint(results)
-                
-                # Be respectful to the server
-                time.sleep(REQUEST_DELAY)
+            pending.put((i, url))
+        
+        results_lock = threading.Lock()
+        stop = threading.Event()
+        
+        def worker() -> None:
+            while not stop.is_set():
+                try:
+                    i, url = pending.get_nowait()
+                except queue.Empty:
+                    return
                 
-            except WebDriverException as e:
-                print(f"Error scraping {url}: {e}")
-                continue
-            except KeyboardInterrupt:
-                print("\nScraping interrupted by user. Progress saved to checkpoint.")
-                break
-            except Exception as e:
-                print(f"Unexpected error scraping {url}: {e}")
-                continue
+                try:
+                    known = url in results
+                    print(f"[{i}/{len(all_sites)}] {'Checking' if known else 'Scraping'}: {url}")
+                    details, fingerprint = self.fetch_site(url, fingerprints.get(url) if known else None)
+                    
+                    with results_lock:
+                        if fingerprint is not None:
+                            fingerprints[url] = fingerprint
+                        
+                        if details is None:
+                            print(f"[{i}/{len(all_sites)}] Unchanged, skipped: {url}")
+                            counts["unchanged"] += 1
+                        else:
+                            counts["updated" if known else "added"] += 1
+                            results[url] = details
+                        
+                        # Journal progress after each page; fold it into the output now and then
+                        self.data_manager.append_entry(url, details, fingerprint)
+                        if self.data_manager.needs_compaction():
+                            self.data_manager.compact(results, fingerprints)
+                    
+                except WebDriverException as e:
+                    print(f"Error scraping {url}: {e}")
+                except Exception as e:
+                    print(f"Unexpected error scraping {url}: {e}")
+        
+        threads = [
+            threading.Thread(target=worker, name=f"{self.site_type}-worker-{n}", daemon=True)
+            for n in range(min(self.workers, pending.qsize()))
+        ]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            for thread in threads:
+                # Join in short slices so Ctrl+C reaches the main thread
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            print("\nScraping interrupted by user. Finishing pages in progress...")
+            stop.set()
+            for thread in threads:
+                thread.join()
+            print("Progress saved to checkpoint.")
+        
+        if refresh:
+            print(f"Refresh summary: {counts['unchanged']} unchanged (skipped), "
+                  f"{counts['updated']} updated, {counts['added']} new")
         
         # Save final results
-        final_count = len(results)
-        if final_count > initial_count:
-            self.data_manager.save_final_results(results)
-            print(f"Scraping completed. Added {final_count - initial_count} new entries.")
+        if counts["added"] or counts["updated"]:
+            self.data_manager.save_final_results(results, fingerprints)
+            print(f"Scraping completed. Added {counts['added']} new entries, updated {counts['updated']}.")
         else:
-            print("No new entries were scraped.")
+            if self.data_manager.has_journal():
+                self.data_manager.compact(results, fingerprints)
+            print("No new or changed entries were scraped.")
     
     def get_statistics(self) -> Dict[str, int]:
         """Get statistics about the current checkpoint data."""
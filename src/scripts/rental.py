@@ -1,64 +1,225 @@
 import http.client
 import urllib.parse
 import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
 # API Key and Host
 API_KEY = "3da3461db0mshd2376caab573a7ep14e0a7jsnd5a43d1668c5"
 API_HOST = "booking-com15.p.rapidapi.com"
+API_BASE_URL = f"https://{API_HOST}"
+SEARCH_PATH = "/api/v1/cars/searchCarRentals"
 
 HEADERS = {
     "x-rapidapi-key": API_KEY,
     "x-rapidapi-host": API_HOST
 }
 
-def schedule_rental(pick_up_lat, pick_up_lon, drop_off_lat, drop_off_lon,
-                    pick_up_date, drop_off_date, pick_up_time, drop_off_time,
-                    json_filename="rental_info.json"):
-    """Schedule a rental by picking the top result from the car rental search and save details to JSON."""
-    params = {
-        "pick_up_latitude": pick_up_lat,
-        "pick_up_longitude": pick_up_lon,
-        "drop_off_latitude": drop_off_lat,
-        "drop_off_longitude": drop_off_lon,
-        "pick_up_date": pick_up_date,
-        "drop_off_date": drop_off_date,
-        "pick_up_time": pick_up_time,
-        "drop_off_time": drop_off_time,
-        "currency_code": "EGP",
-        "location": "Egypt"
-    }
+POOL_SIZE = 4  # Keep-alive connections, and so concurrent searches
+REQUEST_TIMEOUT = 30
 
-    query = urllib.parse.urlencode(params)
+# Manual conversion from INR to EGP (approximate rate)
+INR_TO_EGP = 0.42
 
-    conn = http.client.HTTPSConnection(API_HOST)
-    conn.request("GET", f"/api/v1/cars/searchCarRentals?{query}", headers=HEADERS)
 
-    res = conn.getresponse()
-    data = res.read()
-    conn.close()
+class RentalError(Exception):
+    """A rental search failed (HTTP error or unreadable response)."""
 
-    parsed = json.loads(data.decode("utf-8"))
-    results = parsed.get("data", {}).get("search_results", [])
 
-    if not results:
-        print("🚫 No available rentals found.")
-        return None
+@dataclass(frozen=True)
+class RentalLeg:
+    """One car rental of an itinerary: where and when the car is picked up and dropped off."""
+    pick_up_lat: float
+    pick_up_lon: float
+    drop_off_lat: float
+    drop_off_lon: float
+    pick_up_date: str  # YYYY-MM-DD
+    drop_off_date: str
+    pick_up_time: str  # HH:MM
+    drop_off_time: str
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "pick_up_latitude": self.pick_up_lat,
+            "pick_up_longitude": self.pick_up_lon,
+            "drop_off_latitude": self.drop_off_lat,
+            "drop_off_longitude": self.drop_off_lon,
+            "pick_up_date": self.pick_up_date,
+            "drop_off_date": self.drop_off_date,
+            "pick_up_time": self.pick_up_time,
+            "drop_off_time": self.drop_off_time,
+            "currency_code": "EGP",
+            "location": "Egypt"
+        }
+
+
+class ConnectionPool:
+    """Fixed set of keep-alive HTTP(S) connections to one host.
+
+    Each connection serves one request at a time, so the pool size bounds the
+    number of concurrent searches. A connection the server closed while idle
+    is reopened and the request retried once.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, size: int = POOL_SIZE, timeout: float = REQUEST_TIMEOUT):
+        parsed = urllib.parse.urlparse(base_url)
+        self.host = parsed.netloc
+        self.connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self.timeout = timeout
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put(None)  # Connections are opened on first use
+
+    def get(self, path: str, headers: Dict[str, str]) -> bytes:
+        """Send a GET on an idle connection and return the response body."""
+        conn = self._idle.get()
+        try:
+            for attempt in range(2):
+                if conn is None:
+                    conn = self.connection_class(self.host, timeout=self.timeout)
+                try:
+                    conn.request("GET", path, headers=headers)
+                    res = conn.getresponse()
+                    data = res.read()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # The server closed the idle keep-alive connection; reconnect once
+                    conn.close()
+                    conn = None
+                    if attempt:
+                        raise
+            if res.will_close:
+                conn.close()
+                conn = None
+        except Exception:
+            if conn is not None:
+                conn.close()
+                conn = None
+            raise
+        finally:
+            self._idle.put(conn)
+
+        if res.status != 200:
+            raise RentalError(f"HTTP {res.status} from {self.host}: {data[:200]!r}")
+        return data
+
+    def close(self) -> None:
+        for _ in range(self.size):
+            conn = self._idle.get()
+            if conn is not None:
+                conn.close()
+        for _ in range(self.size):
+            self._idle.put(None)
+
+
+class RentalCache:
+    """
+    Cache of search responses keyed by rounded coordinates and pick-up/drop-off time window.
+
+    Coordinates are snapped to a grid of `precision` degrees (0.01 is about 1 km) and times to
+    `window_minutes`, so legs that start at the same hotel within the same half hour share an
+    entry. Entries older than `ttl_minutes` are not served. With a `path` the cache is kept on disk.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_minutes: float = 60, precision: float = 0.01,
+                 window_minutes: int = 30):
+        self.path = path
+        self.ttl_seconds = ttl_minutes * 60
+        self.precision = precision
+        self.window_minutes = window_minutes
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable rental cache {path}: {e}")
+
+    def _snap(self, value: float) -> str:
+        return f"{round(round(float(value) / self.precision) * self.precision, 4):.4f}"
+
+    def _window(self, hhmm: str) -> str:
+        hours, minutes = (int(part) for part in hhmm.split(":")[:2])
+        start = (hours * 60 + minutes) // self.window_minutes * self.window_minutes
+        return f"{start // 60:02d}:{start % 60:02d}"
+
+    def key(self, leg: RentalLeg) -> str:
+        return ",".join([
+            self._snap(leg.pick_up_lat), self._snap(leg.pick_up_lon),
+            self._snap(leg.drop_off_lat), self._snap(leg.drop_off_lon),
+            leg.pick_up_date, self._window(leg.pick_up_time),
+            leg.drop_off_date, self._window(leg.drop_off_time),
+        ])
+
+    def get(self, leg: RentalLeg) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self.entries.get(self.key(leg))
+        if entry is None or time.time() - entry["fetched_at"] > self.ttl_seconds:
+            return None
+        return entry["results"]
+
+    def put(self, leg: RentalLeg, results: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.entries[self.key(leg)] = {"fetched_at": time.time(), "results": results}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            self.entries = {k: v for k, v in self.entries.items() if now - v["fetched_at"] <= self.ttl_seconds}
+            data = json.dumps(self.entries)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+_default_pool = None
+_default_cache = RentalCache()
+_default_lock = threading.Lock()
+
+
+def default_pool() -> ConnectionPool:
+    """Connection pool to the RapidAPI host shared by every search in this process."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
 
-    top_rental = results[0]
 
-    # Extract vehicle info
-    vehicle = top_rental.get("vehicle_info", {})
-    car_name = vehicle.get("v_name", "N/A")
-    car_category = vehicle.get("group_or_similar", "N/A")
-    car_image = vehicle.get("image_url", "")
+def fetch_rentals(leg: RentalLeg, pool: Optional[ConnectionPool] = None,
+                  cache: Optional[RentalCache] = None) -> List[Dict[str, Any]]:
+    """Raw search results for one leg, from the cache when a fresh entry exists."""
+    pool = pool or default_pool()
+    cache = cache if cache is not None else _default_cache
+    cached = cache.get(leg)
+    if cached is not None:
+        return cached
 
-    # Extract pricing
-    pricing = top_rental.get("pricing_info", {})
+    query = urllib.parse.urlencode(leg.params())
+    data = pool.get(f"{SEARCH_PATH}?{query}", HEADERS)
+    try:
+        parsed = json.loads(data.decode("utf-8"))
+    except ValueError as e:
+        raise RentalError(f"Unreadable search response: {e}")
+    results = (parsed.get("data") or {}).get("search_results") or []
+    cache.put(leg, results)
+    return results
+
+
+def price_in_egp(pricing: Dict[str, Any]):
+    """Price and currency of a search result, converting INR prices the way the original script did."""
     price = pricing.get("price", "N/A")
     currency = pricing.get("currency", "N/A")
-
-    # Manual conversion from INR to EGP (approximate rate)
-    INR_TO_EGP = 0.42
     if currency != "EGP" and price != "N/A":
         try:
             price_egp = float(price) * INR_TO_EGP
@@ -69,62 +230,118 @@ def schedule_rental(pick_up_lat, pick_up_lon, drop_off_lat, drop_off_lon,
             currency = "EGP"
         except Exception:
             pass
+    return price, currency
 
-    # Extract supplier info
-    supplier_info = top_rental.get("supplier_info", {})
-    supplier = supplier_info.get("name", "Unknown")
-
-    # Extract rating info correctly from rating_info key
-    rating_info = top_rental.get("rating_info", {})
-    rating_value = rating_info.get("average", "N/A")
-    rating_title = rating_info.get("average_text", "N/A")
-    rating_subtitle = f"{rating_info.get('no_of_ratings', 'N/A')} reviews"
-
-    # Extract location details
-    pick_info = top_rental.get("route_info", {}).get("pickup", {})
-    drop_info = top_rental.get("route_info", {}).get("dropoff", {})
-    pick_place = pick_info.get("name", "Unknown")
-    drop_place = drop_info.get("name", "Unknown")
 
-    # Display result
-    print("✅ Rental Car Found")
-    print(f"🚗 Car: {car_name} ({car_category})")
-    print(f"🖼️ Image: {car_image}")
-    print(f"💵 Price: {price} {currency}")
-    print(f"🏢 Supplier: {supplier}")
-    print(f"⭐ Rating: {rating_value} ({rating_title}) — {rating_subtitle}")
-    print(f"📍 Pick-up: {pick_place} at {pick_up_date} {pick_up_time}")
-    print(f"📍 Drop-off: {drop_place} at {drop_off_date} {drop_off_time}")
-
-    # Prepare data dictionary to save
-    rental_data = {
+def summarize_rental(result: Dict[str, Any], leg: RentalLeg) -> Dict[str, Any]:
+    """Car, price, supplier, rating and route of one search result."""
+    vehicle = result.get("vehicle_info", {})
+    price, currency = price_in_egp(result.get("pricing_info", {}))
+    rating_info = result.get("rating_info", {})
+    pick_info = result.get("route_info", {}).get("pickup", {})
+    drop_info = result.get("route_info", {}).get("dropoff", {})
+    return {
         "car": {
-            "name": car_name,
-            "category": car_category,
-            "image": car_image
+            "name": vehicle.get("v_name", "N/A"),
+            "category": vehicle.get("group_or_similar", "N/A"),
+            "image": vehicle.get("image_url", "")
         },
         "price": {
             "amount": price,
             "currency": currency
         },
-        "supplier": supplier,
+        "supplier": result.get("supplier_info", {}).get("name", "Unknown"),
         "rating": {
-            "value": rating_value,
-            "title": rating_title,
-            "reviews": rating_subtitle
+            "value": rating_info.get("average", "N/A"),
+            "title": rating_info.get("average_text", "N/A"),
+            "reviews": f"{rating_info.get('no_of_ratings', 'N/A')} reviews"
         },
         "pickup": {
-            "location": pick_place,
-            "date": pick_up_date,
-            "time": pick_up_time
+            "location": pick_info.get("name", "Unknown"),
+            "date": leg.pick_up_date,
+            "time": leg.pick_up_time
         },
         "dropoff": {
-            "location": drop_place,
-            "date": drop_off_date,
-            "time": drop_off_time
+            "location": drop_info.get("name", "Unknown"),
+            "date": leg.drop_off_date,
+            "time": leg.drop_off_time
         }
     }
 
+
+def _as_float(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def rank_rentals(candidates: List[Dict[str, Any]], top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Cheapest first, better rated first at the same price; results without a price go last."""
+    ranked = sorted(candidates, key=lambda c: (_as_float(c["price"]["amount"], float("inf")),
+                                               -_as_float(c["rating"]["value"], 0.0)))
+    return ranked[:top_n] if top_n else ranked
+
+
+def search_rentals(legs: List[RentalLeg], top_n: int = 5, pool: Optional[ConnectionPool] = None,
+                   cache: Optional[RentalCache] = None) -> List[Dict[str, Any]]:
+    """
+    Search every leg of an itinerary concurrently over the keep-alive pool.
+
+    Returns one dict per leg, in order: {"leg", "candidates" (ranked summaries), "error"}.
+    Legs that share a cache key are searched once.
+    """
+    pool = pool or default_pool()
+    cache = cache if cache is not None else _default_cache
+
+    unique = {}
+    for leg in legs:
+        unique.setdefault(cache.key(leg), leg)
+
+    def search(leg):
+        try:
+            return fetch_rentals(leg, pool, cache), None
+        except (RentalError, OSError, http.client.HTTPException) as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        fetched = dict(zip(unique, executor.map(search, unique.values())))
+    cache.save()
+
+    found = []
+    for leg in legs:
+        results, error = fetched[cache.key(leg)]
+        candidates = rank_rentals([summarize_rental(r, leg) for r in results or []], top_n)
+        found.append({"leg": leg, "candidates": candidates, "error": error})
+    return found
+
+
+def schedule_rental(pick_up_lat, pick_up_lon, drop_off_lat, drop_off_lon,
+                    pick_up_date, drop_off_date, pick_up_time, drop_off_time,
+                    json_filename="rental_info.json"):
+    """Schedule a rental by picking the top result from the car rental search and save details to JSON."""
+    leg = RentalLeg(pick_up_lat, pick_up_lon, drop_off_lat, drop_off_lon,
+                    pick_up_date, drop_off_date, pick_up_time, drop_off_time)
+    results = fetch_rentals(leg)
+
+    if not results:
+        print("🚫 No available rentals found.")
+        return None
+
+    top_rental = results[0]
+    rental_data = summarize_rental(top_rental, leg)
+    car, price, rating = rental_data["car"], rental_data["price"], rental_data["rating"]
+
+    # Display result
+    print("✅ Rental Car Found")
+    print(f"🚗 Car: {car['name']} ({car['category']})")
+    print(f"🖼️ Image: {car['image']}")
+    print(f"💵 Price: {price['amount']} {price['currency']}")
+    print(f"🏢 Supplier: {rental_data['supplier']}")
+    print(f"⭐ Rating: {rating['value']} ({rating['title']}) — {rating['reviews']}")
+    print(f"📍 Pick-up: {rental_data['pickup']['location']} at {pick_up_date} {pick_up_time}")
+    print(f"📍 Drop-off: {rental_data['dropoff']['location']} at {drop_off_date} {drop_off_time}")
+
     # Save to JSON file
     with open(json_filename, "w", encoding="utf-8") as f:
         json.dump(rental_data, f, indent=4)
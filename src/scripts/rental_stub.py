@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Local stub of the RapidAPI ``searchCarRentals`` endpoint.
+
+``RentalApiStub`` answers ``GET /api/v1/cars/searchCarRentals`` over HTTP/1.1
+keep-alive with generated search results after an optional delay, and counts
+the requests and the client connections it sees. Running this file checks
+``search_rentals`` in ``rental.py`` against it: concurrency, connection reuse,
+the result cache, deduplication of identical legs, ranking and error handling.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from rental import SEARCH_PATH, ConnectionPool, RentalCache, RentalLeg, search_rentals
+
+
+def stub_results(params: Dict[str, str], count: int = 6) -> List[Dict[str, Any]]:
+    """Search results in the shape of the live API, priced in INR like its answers."""
+    seed = int(float(params.get("pick_up_latitude", 0)) * 1000) % 7
+    return [{
+        "vehicle_info": {"v_name": f"Car {i}", "group_or_similar": "Economy", "image_url": f"https://example.com/{i}.jpg"},
+        "pricing_info": {"price": 40000 + ((i * 37 + seed * 11) % 9) * 2500, "currency": "INR"},
+        "supplier_info": {"name": f"Supplier {i % 3}"},
+        "rating_info": {"average": round(6 + (i % 4), 1), "average_text": "Good", "no_of_ratings": 10 * i},
+        "route_info": {"pickup": {"name": f"Pick-up desk {seed}"}, "dropoff": {"name": "Drop-off desk"}},
+    } for i in range(count)]
+
+
+class RentalApiStub:
+    """Serves the search endpoint on a free localhost port in a background thread.
+
+    Requests whose pick-up date is ``fail_date`` get a 429, as the live API
+    does when a plan's quota is exhausted.
+    """
+
+    def __init__(self, delay: float = 0.0, fail_date: str = ""):
+        self.delay = delay
+        self.fail_date = fail_date
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                time.sleep(stub.delay)
+                if url.path != SEARCH_PATH:
+                    self._send(404, {"message": "not found"})
+                elif params.get("pick_up_date") == stub.fail_date:
+                    self._send(429, {"message": "Too many requests"})
+                else:
+                    self._send(200, {"status": True, "data": {"search_results": stub_results(params)}})
+
+            def _send(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def itinerary_legs(count: int) -> List[RentalLeg]:
+    """count distinct one-day legs between Cairo, Luxor and Aswan."""
+    cities = [(30.0444, 31.2357), (25.6872, 32.6396), (24.0889, 32.8998)]
+    legs = []
+    for i in range(count):
+        (lat1, lon1), (lat2, lon2) = cities[i % 3], cities[(i + 1) % 3]
+        day = f"2025-09-{1 + i % 28:02d}"
+        legs.append(RentalLeg(lat1, lon1, lat2, lon2, day, day, f"{8 + i // 28:02d}:00", "20:00"))
+    return legs
+
+
+def check() -> None:
+    """Exercise the batched search against the stub and print what happened."""
+    stub = RentalApiStub(delay=0.1)
+    legs = itinerary_legs(12)
+
+    start = time.perf_counter()
+    for leg in legs:
+        single = ConnectionPool(stub.base_url, size=1)  # A fresh connection per leg, as schedule_rental used to open
+        search_rentals([leg], pool=single, cache=RentalCache())
+        single.close()
+    serial = time.perf_counter() - start
+    serial_connections = len(stub.connections)
+
+    stub.connections.clear()
+    before = stub.requests
+    pool = ConnectionPool(stub.base_url, size=4)
+    cache = RentalCache()
+    start = time.perf_counter()
+    found = search_rentals(legs, top_n=3, pool=pool, cache=cache)
+    batched = time.perf_counter() - start
+    assert all(len(leg["candidates"]) == 3 and leg["error"] is None for leg in found)
+    print(f"12 legs: one connection per leg {serial:.2f} s ({serial_connections} connections), "
+          f"batched {batched:.2f} s ({stub.requests - before} requests over {len(stub.connections)} connections)")
+
+    prices = [float(c["price"]["amount"]) for c in found[0]["candidates"]]
+    assert prices == sorted(prices) and found[0]["candidates"][0]["price"]["currency"] == "EGP"
+    print(f"Ranking: cheapest first {prices}")
+
+    before = stub.requests
+    start = time.perf_counter()
+    again = search_rentals(legs, top_n=3, pool=pool, cache=cache)
+    assert [leg["candidates"] for leg in again] == [leg["candidates"] for leg in found]
+    print(f"Cache: repeat search {1000 * (time.perf_counter() - start):.1f} ms, {stub.requests - before} requests")
+
+    # 08:10 and 08:20 fall in the same half-hour window, and 30.0449 rounds to the same 0.01 grid cell
+    nearby = [RentalLeg(30.0449, 31.2357, 25.6872, 32.6396, "2025-09-01", "2025-09-01", "08:10", "20:00"),
+              RentalLeg(30.0444, 31.2357, 25.6872, 32.6396, "2025-09-01", "2025-09-01", "08:20", "20:00")]
+    before = stub.requests
+    search_rentals(nearby, pool=pool, cache=RentalCache())
+    print(f"Deduplication: 2 legs in one cache cell -> {stub.requests - before} request(s)")
+
+    stub.fail_date = "2025-09-02"
+    failing = search_rentals(itinerary_legs(3), pool=pool, cache=RentalCache())
+    assert failing[1]["error"] and not failing[1]["candidates"] and failing[0]["candidates"]
+    print(f"Errors: {failing[1]['error']}")
+    pool.close()
+    stub.close()
+
+
+if __name__ == "__main__":
+    check()
@@ -1,5 +1,9 @@
+import os
+
 import requests
 
+from amenities import INDEX_FILE, AmenityIndex
+
 # === Configuration ===
 # Coordinates for Cairo, Egypt
 latitude = 30.0444
@@ -16,20 +20,30 @@ node(around:{radius_meters},{latitude},{longitude})["amenity"="restaurant"];
 out center 10;
 """
 
-# === API Request ===
-response = requests.post(overpass_url, data=query)
+if __name__ == "__main__":
+    # === Offline index (see amenities.py) ===
+    # Answers from amenities.npz when it has been built; otherwise falls back to a live Overpass query
+    if os.path.exists(INDEX_FILE):
+        restaurants = AmenityIndex(INDEX_FILE).nearby(latitude, longitude, radius_meters, tags="restaurant", k=10)
+        print(f"Restaurants within {radius_meters} meters of ({latitude}, {longitude}) (offline index):\n")
+        for restaurant in restaurants:
+            print(f"- {restaurant['name'] or '<no name>'} at ({restaurant['lat']}, {restaurant['lon']}), "
+                  f"{restaurant['distance_m']:.0f} m")
+    else:
+        # === API Request ===
+        response = requests.post(overpass_url, data=query)
 
-# Raise an error if the request failed
-response.raise_for_status()
+        # Raise an error if the request failed
+        response.raise_for_status()
 
-# Parse JSON response
-data = response.json()
+        # Parse JSON response
+        data = response.json()
 
-# === Display Results ===
-print(f"Restaurants within {radius_meters} meters of ({latitude}, {longitude}):\n")
-for element in data.get("elements", []):
-    tags = element.get("tags", {})
-    name = tags.get("name", "<no name>")
-    lat = element.get("lat")
-    lon = element.get("lon")
-    print(f"- {name} at ({lat}, {lon})")
\ No newline at end of file
+        # === Display Results ===
+        print(f"Restaurants within {radius_meters} meters of ({latitude}, {longitude}):\n")
+        for element in data.get("elements", []):
+            tags = element.get("tags", {})
+            name = tags.get("name", "<no name>")
+            lat = element.get("lat")
+            lon = element.get("lon")
+            print(f"- {name} at ({lat}, {lon})")